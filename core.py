@@ -1,14 +1,65 @@
 import os
+import stat
+import re
+import math
+import ntpath
+import heapq
+import bisect
+import hashlib
 import time
-import winreg
+import random
+import asyncio
+try: import winreg
+except ImportError: winreg = None  # 非 Windows：注册表相关功能不可用，解析器等纯逻辑仍可在其他系统上校验（见 benchmark.py）
 import ctypes
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from utils import format_size
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from queue import SimpleQueue, Empty
+from utils import format_size, scan_dir_entries, DirSizeIndex, WorkStealingSizer, SizeTree, IOConcurrency, walk_ordered, HashCache, CandidateStore, NameIndex, peak_memory
+import utils
 from datetime import datetime
 
-class SystemCleaner:
+WINDLL = getattr(ctypes, "windll", None)  # 非 Windows 为 None
+
+
+def _fixed_drives():
+    """本机固定磁盘的根目录（"C:/" 等）；非 Windows 下为空列表"""
+    if WINDLL is None: return []
+    bitmask = WINDLL.kernel32.GetLogicalDrives()
+    drives = [chr(ord('A') + i) + ":/" for i in range(26) if bitmask & (1 << i)]
+    return [d for d in drives if WINDLL.kernel32.GetDriveTypeW(d) == 3]  # DRIVE_FIXED
+
+class ScanToken(threading.Event):
+    """一次扫描的取消令牌，同时携带该扫描提交到后台、尚待回填的精确统计 {future: 路径}；
+    同一个 cleaner 上并发的多次扫描各自回填，互不干扰"""
     def __init__(self):
+        super().__init__()
+        self.pending_exact = {}
+
+MONTH_DIR_RE = re.compile(r"^(\d{4})-(0[1-9]|1[0-2])$")
+
+_WORKER_CLEANER = None
+
+def _process_worker_init():
+    """进程池初始化：每个工作进程持有一个不加载持久缓存的 SystemCleaner，不再嵌套并行统计；
+    大小索引不从磁盘读取，由每个分片随任务带来所在子树的索引切片"""
+    global _WORKER_CLEANER
+    _WORKER_CLEANER = SystemCleaner(load_caches=False)
+    _WORKER_CLEANER.set_size_parallelism(1)
+
+def _process_shard(kind, arg, index_slice=None):
+    """返回 (分片结果, 更新后的索引切片)；切片未变化（或未启用索引）时为 None，由父进程合并回持久索引"""
+    index = _WORKER_CLEANER.size_index = DirSizeIndex(entries=index_slice) if index_slice is not None else None
+    result = _WORKER_CLEANER._scan_shard(kind, arg)
+    return result, (index.entries if index is not None and index.dirty else None)
+
+def _scan_secret_batch(job):
+    """一批 [(路径, 大小)] 的凭据扫描结果；模块级函数，线程与进程后端共用"""
+    return [utils.scan_file_secrets(path, size) for path, size in job]
+
+class SystemCleaner:
+    def __init__(self, load_caches=True):
         self.user_profile = os.environ['USERPROFILE']
         self.local_appdata = os.environ['LOCALAPPDATA']
         self.roaming_appdata = os.environ['APPDATA']
@@ -33,6 +84,17 @@ class SystemCleaner:
         self.safe_keywords = ['cache', 'temp', 'log', 'logs', 'dump', 'crashes', 'crashpad', 'shadercache']
         self.danger_keywords = ['profile', 'save', 'saved', 'backup', 'database', 'user data', 'config', 'cookies']
 
+        # 顶层应用目录名 -> (分类, 软件名)，按顺序优先
+        self.app_map = {
+            'google': ('浏览器缓存', 'Google Chrome'), 'chrome': ('浏览器缓存', 'Google Chrome'), 'edge': ('浏览器缓存', 'Edge'),
+            'microsoft': ('应用缓存', 'Microsoft Apps'), 'tencent': ('社交通讯', '腾讯软件'), 'wechat': ('社交通讯', '微信 WeChat'), 
+            'dingtalk': ('办公软件', '钉钉'), 'feishu': ('办公软件', '飞书'), 'adobe': ('设计工具', 'Adobe'), 'steam': ('游戏平台', 'Steam'),
+            'discord': ('通讯软件', 'Discord'), 'telegram': ('通讯软件', 'Telegram'), 'slack': ('通讯软件', 'Slack'),
+            'jetbrains': ('开发工具', 'JetBrains IDE'), 'vscode': ('开发工具', 'VS Code'), 'code': ('开发工具', 'VS Code'),
+            'netease': ('音乐软件', '网易云音乐'), 'qqmusic': ('音乐软件', 'QQ音乐'),
+        }
+        self._compile_matchers()
+
         # 扩展应用进程映射
         self.APP_PROCESSES = {
             "微信 WeChat": ["WeChat.exe", "WeChatPlayer.exe"],
@@ -69,13 +131,89 @@ class SystemCleaner:
             {"name": "npm缓存", "paths": [os.path.join(self.roaming_appdata, "npm-cache"), os.path.join(self.local_appdata, "npm-cache")], "cat": "开发缓存", "subs": []},
             {"name": "yarn缓存", "paths": [os.path.join(self.local_appdata, "Yarn/Cache")], "cat": "开发缓存", "subs": []},
             {"name": "pip缓存", "paths": [os.path.join(self.local_appdata, "pip/cache")], "cat": "开发缓存", "subs": []},
-            {"name": "Docker镜像", "paths": [os.path.join(self.local_appdata, "Docker/wsl")], "cat": "开发缓存", "subs": []},
-            {"name": "Maven缓存", "paths": [os.path.join(self.user_profile, ".m2/repository")], "cat": "开发缓存", "subs": []},
-            {"name": "Gradle缓存", "paths": [os.path.join(self.user_profile, ".gradle/caches")], "cat": "开发缓存", "subs": []},
+            {"name": "Docker镜像", "paths": [os.path.join(self.local_appdata, "Docker/wsl")], "cat": "开发缓存", "subs": [], "huge": True},
+            {"name": "Maven缓存", "paths": [os.path.join(self.user_profile, ".m2/repository")], "cat": "开发缓存", "subs": [], "huge": True},
+            {"name": "Gradle缓存", "paths": [os.path.join(self.user_profile, ".gradle/caches")], "cat": "开发缓存", "subs": [], "huge": True},
         ]
         
+        # 离职雷达目标
+        # 雷达目标：deep 的目录名足够独特，任意深度命中均可信；其余通用名（DingTalk、Lark 等）只接受盘符下
+        # RADAR_SHALLOW_DEPTH 层以内的命中，避免把 site-packages\lark、程序安装目录之类当作账号数据粉碎
+        self.radar_targets = [
+            {"name": "微信 WeChat", "patterns": ["WeChat Files"], "cat": "通讯软件", "deep": True},
+            {"name": "企业微信 WeCom", "patterns": ["WXWork"], "cat": "通讯软件"},
+            {"name": "腾讯 QQ", "patterns": ["Tencent Files", "TencentFiles"], "cat": "通讯软件", "deep": True},
+            {"name": "钉钉 DingTalk", "patterns": ["DingTalk"], "cat": "办公软件"},
+            {"name": "飞书 Feishu", "patterns": ["Feishu", "Lark"], "cat": "办公软件"}
+        ]
+        self.RADAR_SHALLOW_DEPTH = 2
+
+        # 分片扫描后端："thread" 线程池；"process" 进程池（绕开 GIL，适合海量目录的关键词匹配）
+        self.scan_backend = "thread"
+        self._proc_pool = None
+
+        # 超大目标先显示抽样估计，精确值在后台统计完成后以 update 消息回填
+        self.estimate_huge_targets = True
+        self._exact_pool = None
+
+        # 协作式取消：每次扫描一个独立的令牌（cancel_event 为最近一次扫描的令牌），置位后该扫描的循环、
+        # 统计线程池尽快退出；扫描线程与其线程池经 bind_scan 绑定自己的令牌，新扫描开始不会让被放弃的旧扫描复活
+        self.cancel_event = ScanToken()
+        self._scan_local = threading.local()
+
         # 扫描进度追踪
         self.scan_progress = {"current": 0, "total": 0, "start_time": 0}
+        # 遍历统计（每次扫描访问的条目数与统计字节数）
+        self.walk_stats = {"entries": 0, "dirs": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+        # 目录大小持久索引（目录 mtime 未变则不重新遍历），置为 None 可关闭
+        self.size_index = DirSizeIndex() if load_caches else None
+        # 单个目录统计的最大并行度（共享工作窃取线程池），1 表示单线程
+        self.size_pool = None
+        self.set_size_parallelism(min(4, os.cpu_count() or 4))
+        # 内存大小树：共享祖先的多个目标只遍历一次，跨模式在有效期内复用
+        self.size_trees = []
+        self.size_tree_ttl = 300
+        self._tree_lock = threading.Lock()
+        # 按设备限流：SSD / 机械盘 / 网络共享各自的并发上限，按目录读取延迟自适应
+        self.io_limits = IOConcurrency()
+        # 按磁盘位置（inode / 创建时间）排序访问目录项：None 为自动（机械盘开启），True/False 强制
+        self.seek_order = None
+        # 大文件雷达：扫描根目录（None 为下载/桌面/文档/视频/图片）、最小体积、保留前 K 个
+        self.large_file_roots = None
+        self.large_file_threshold = 100 * 1024 * 1024
+        self.large_file_top_k = 1000
+        # 重复文件：头部预筛字节数、全量哈希与逐字节比较的块大小（每个线程复用一块缓冲区）
+        self.HEAD_BYTES = 64 * 1024
+        self.HASH_CHUNK = 1024 * 1024
+        self._hash_local = threading.local()
+        # 文件摘要持久缓存（按路径+大小+mtime+inode），置为 None 可关闭
+        self.hash_cache = HashCache() if load_caches else None
+        # 重复文件候选存储的内存上限，超过后溢写到临时文件
+        self.dup_store_limit = 256 * 1024 * 1024
+        # 同尺寸候选每批送入哈希流水线的文件数（单个同尺寸组再大也整组处理）
+        self.DUP_BATCH = 4096
+        # 相似图片：感知哈希汉明距离阈值（64 位中最多几位不同）
+        self.similar_max_distance = 4
+        # 离职雷达：各磁盘的目录名持久索引（按目录 mtime 增量刷新），刷新间隔内直接查询
+        self.name_indexes = {}
+        self.name_index_ttl = 600
+        self._name_index_lock = threading.Lock()
+        # 离职专清：覆写遍数、每批 fsync 的文件数、删除前回读校验；shred_stats 累计本次粉碎的文件数 / 写入量 / 耗时
+        self.shred_passes = 1
+        self.shred_fsync_batch = 32
+        self.shred_verify = False
+        self.reset_shred_stats()
+        # 离职专清：明文凭据内容扫描（None 为桌面与文档），单个文件大小上限，每批文件数
+        self.secret_scan = True
+        self.secret_roots = None
+        self.secret_max_size = 64 * 1024 * 1024
+        self.SECRET_BATCH = 64
+        self.SECRET_CACHE_KIND = "secret3"  # 规则变化时更换，旧规则的缓存结果不再命中，随 KEEP_DAYS 过期
+        # 社交专清：按文件头识别真实类型（每个文件只读 SNIFF_BYTES 字节，每批 SNIFF_BATCH 个文件），置为 False 可关闭
+        self.classify_social = True
+        self.SNIFF_BYTES = 16
+        self.SNIFF_BATCH = 512
 
     def detect_active_processes(self, app_names):
         active = []
@@ -99,23 +237,231 @@ class SystemCleaner:
                 for proc in self.APP_PROCESSES[name]:
                     subprocess.run(f'taskkill /F /IM {proc} /T'.replace('"', '"'), shell=True, capture_output=True)
 
-    def get_dir_size_fast(self, path):
+    def get_dir_size_fast(self, path, stats=None):
+        path = os.path.normpath(path)
+        cached = self._lookup_size_tree(path)
+        if cached is not None:
+            if stats is not None: stats["bytes"] += cached
+            return cached
+        # 机械盘上多线程并行只会加剧寻道，单线程顺序遍历
+        pool = self.size_pool
+        total = None
+        if pool is not None and self.io_limits.limiter(path).kind != "hdd":
+            local = {"entries": 0, "dirs": 0}
+            # 统计途中线程池被 set_size_parallelism 替换而关闭时，退回单线程重新统计
+            try: total = pool.dir_size(path, local, self.cancel_token().is_set)
+            except RuntimeError: pass
+            else:
+                if stats is not None: stats["entries"] += local["entries"]; stats["dirs"] += local["dirs"]
+        if total is None: total = self._dir_size_serial(path, stats)
+        if stats is not None: stats["bytes"] += total
+        return total
+
+    def _dir_size_serial(self, path, stats=None):
         total = 0
         try:
             stack = [path]
-            while stack:
-                current = stack.pop()
-                try:
-                    with os.scandir(current) as it:
-                        for entry in it:
-                            try:
-                                if entry.is_file(follow_symlinks=False): total += entry.stat(follow_symlinks=False).st_size
-                                elif entry.is_dir(follow_symlinks=False): stack.append(entry.path)
-                            except: pass
-                except: pass
+            while stack and not self._cancelled():
+                size, _, subdirs = self._visit_dir(stack.pop(), stats)
+                total += size
+                stack.extend(subdirs)
         except: pass
         return total
 
+    def _visit_dir(self, path, stats=None):
+        """列出单个目录 -> (直属文件大小, 直属文件数, 子目录路径列表)，优先查询持久索引；
+        真正列举了目录时，按条目数归一的耗时计入所在设备的延迟反馈（索引命中只是一次 stat，不计入）"""
+        lim = self.io_limits.limiter(path)
+        ordered = lim.kind == "hdd" if self.seek_order is None else self.seek_order
+        local = {"entries": 0, "dirs": 0}
+        t = time.perf_counter()
+        if self.size_index is not None: res = self.size_index.scan_dir(path, local, ordered)
+        else:
+            size, count, subdirs, big = scan_dir_entries(path, local, ordered)
+            res = size + sum(big.values()), count, subdirs
+        if local["entries"]: lim.observe(time.perf_counter() - t, count=local["entries"])
+        if stats is not None:
+            stats["entries"] += local["entries"]
+            stats["dirs"] += local["dirs"]
+        return res
+
+    def _seek_ordered(self, path):
+        """path 所在设备是否按磁盘位置顺序遍历"""
+        if self.seek_order is not None: return self.seek_order
+        return self.io_limits.limiter(path).kind == "hdd"
+
+    def _lookup_size_tree(self, path):
+        now = time.time()
+        for tree in self.size_trees:
+            if now - tree.built_at < self.size_tree_ttl and tree.contains(path):
+                # 落在树的范围内却不在树中（建树后新建、经由联接点 / 符号链接到达）按未命中处理，由调用方实际统计
+                size = tree.size_of(path)
+                if size is not None: return size
+        return None
+
+    def tree_size(self, path, root=None):
+        """经由大小树查询目录大小：path 落在有效的树内时 O(1) 返回；
+        否则给定 root 时以 root 建树（一次遍历，供其下所有目标复用），未给定则直接统计"""
+        if not os.path.isdir(path):
+            try: return os.path.getsize(path)
+            except: return 0
+        cached = self._lookup_size_tree(path)
+        if cached is not None: return cached
+        if root is None: return self.get_dir_size_fast(path)
+        tree = SizeTree(root, self._visit_dir, cancelled=self.cancel_token().is_set)
+        if self._cancelled(): return tree.size_of(path) or 0  # 不完整的树不缓存
+        now = time.time()
+        with self._tree_lock:
+            self.size_trees = [t for t in self.size_trees if now - t.built_at < self.size_tree_ttl] + [tree]
+        size = tree.size_of(path)
+        return size if size is not None else self.get_dir_size_fast(path)
+
+    def _drop_size_trees(self, path):
+        """删除/粉碎后丢弃覆盖该路径的大小树"""
+        key = os.path.normcase(os.path.normpath(path))
+        with self._tree_lock:
+            self.size_trees = [t for t in self.size_trees if not (t.contains(path) or t.root.startswith(key.rstrip(os.sep) + os.sep))]
+
+    def _tree_roots(self, paths):
+        """为一组目标选择大小树的根：{目标: 根}。只有目标之间互相嵌套时才共用一棵树，根取包含它的最外层目标；
+        并列的目标（哪怕同属一个父目录）各自统计，以父目录为根会把无关的兄弟目录（如 Steam 的 steamapps）一并遍历"""
+        existing = [os.path.normpath(p) for p in paths if os.path.exists(p)]
+        keys = {p: os.path.normcase(p).rstrip(os.sep) + os.sep for p in existing}
+        roots = {}
+        for p in existing:
+            outer = [q for q in existing if keys[p].startswith(keys[q])]  # 包含 p 的目标（含 p 自身）
+            nested = any(q != p and keys[q].startswith(keys[p]) for q in existing)
+            top = min(outer, key=len)
+            roots[p] = top if top != p or nested else None
+        return roots
+
+    def estimate_dir_size(self, path, sample=8, max_depth=3, seed=None, frac=0.2):
+        """抽样估算目录大小，返回 (估计值, 误差参考值)。
+        每层子目录不多于抽样数时全部下探，否则无放回随机抽取 max(sample, √n, n·frac) 个按 n/k 外推（两阶段抽样方差）；
+        到达 max_depth 时对抽中的子目录做精确统计。
+        误差参考值为 1.96 倍估计标准误，不是严格的 95% 置信区间：目录大小呈重尾分布，样本漏掉少数巨型子目录时
+        估计值与样本方差会一起偏小（benchmark.py estimate 中约 85~90% 覆盖）。"""
+        rnd = random.Random(seed)
+        est, var = self._estimate_node(os.path.normpath(path), 1, sample, max_depth, rnd, frac)
+        return int(est), int(1.96 * math.sqrt(var))
+
+    def _estimate_node(self, path, depth, sample, max_depth, rnd, frac):
+        size, _, subdirs = self._visit_dir(path)
+        n = len(subdirs)
+        if n == 0 or self._cancelled(): return size, 0.0
+        k = max(sample, int(math.sqrt(n)), int(n * frac))
+        picked = subdirs if n <= k else rnd.sample(subdirs, k)
+        if depth >= max_depth: parts = [(self.get_dir_size_fast(d), 0.0) for d in picked]
+        else: parts = [self._estimate_node(d, depth + 1, sample, max_depth, rnd, frac) for d in picked]
+        if n <= k: return size + sum(p[0] for p in parts), sum(p[1] for p in parts)
+        vals = [p[0] for p in parts]
+        mean = sum(vals) / k
+        s2 = sum((v - mean) ** 2 for v in vals) / (k - 1)
+        var = n * n * (1 - k / n) * s2 / k + (n / k) * sum(p[1] for p in parts)
+        return size + n * mean, var
+
+    def _sized_item(self, data, path, min_size=0):
+        """为超大目标生成 item：先给出抽样估计立即显示，精确统计提交后台，由 _drain_exact_updates 回填。
+        估计值不超过 min_size 时返回 None。"""
+        if not self.estimate_huge_targets or self._lookup_size_tree(path) is not None:
+            s = self.tree_size(path)
+            if s <= min_size: return None
+            data.update({"path": path, "raw_size": s, "display_size": format_size(s)})
+            return {"type": "item", "data": data}
+        est, err = self.estimate_dir_size(path)
+        if est <= min_size and err == 0: return None
+        if self._exact_pool is None: self._exact_pool = ThreadPoolExecutor(max_workers=2)
+        token = self.cancel_token()
+        token.pending_exact[self._exact_pool.submit(self._run_bound, token, self.get_dir_size_fast, path)] = path
+        data.update({"path": path, "raw_size": est, "display_size": f"≈{format_size(est)} ±{format_size(err)}", "estimated": True})
+        return {"type": "item", "data": data}
+
+    def _drain_exact_updates(self):
+        """等待本次扫描的后台精确统计，逐个产出 update 消息（按 path 覆盖此前的估计值）"""
+        token = self.cancel_token()
+        pending, token.pending_exact = token.pending_exact, {}
+        for fut in self._iter_completed(pending):
+            try: s = fut.result()
+            except: continue
+            yield {"type": "update", "data": {"path": pending[fut], "raw_size": s, "display_size": format_size(s)}}
+
+    def set_size_parallelism(self, workers):
+        """设置 get_dir_size_fast 的最大并行线程数"""
+        if self.size_pool is not None: self.size_pool.shutdown()
+        self.size_parallelism = max(1, int(workers))
+        self.size_pool = WorkStealingSizer(self._visit_dir, self.size_parallelism, self._cancelled) if self.size_parallelism > 1 else None
+
+    def flush_size_index(self):
+        if self.size_index is not None: self.size_index.save()
+
+    def refresh_size_index(self):
+        """强制下次扫描全量重新统计"""
+        if self.size_index is not None: self.size_index.clear()
+
+    def walk_and_size(self, base, match, max_depth=3):
+        """单次遍历引擎：在 max_depth 层内按 match(目录名) 查找命中目录，命中后就地统计其大小。
+        命中目录的子树只被遍历一次，不再先 os.walk 再逐个 get_dir_size_fast。
+        返回 ([(路径, 相对深度, 大小), ...], {"entries", "dirs", "bytes"})"""
+        hits = []
+        stats = {"entries": 0, "dirs": 0, "bytes": 0}
+        base = os.path.normpath(base)
+        if match(os.path.basename(base)):
+            hits.append((base, 0, self.get_dir_size_fast(base, stats)))
+            return hits, stats
+        stack = [(base, 0)]
+        while stack and not self._cancelled():
+            current, depth = stack.pop()
+            for sub in self._visit_dir(current, stats)[2]:
+                if match(os.path.basename(sub)):
+                    hits.append((sub, depth + 1, self.get_dir_size_fast(sub, stats)))
+                elif depth + 1 < max_depth:
+                    stack.append((sub, depth + 1))
+        return hits, stats
+
+    _CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|(?<=[A-Za-z])(?=[0-9])")
+
+    def _compile_matchers(self):
+        """把关键词规则编译成正则，修改 safe_keywords / danger_keywords / app_map 后需重新调用。
+        短关键词（log、temp、dump 等）必须是完整的词，避免 log 命中 catalog / Login、temp 命中 Templates；
+        复数形式（logs、temps、dumps）显式加入。驼峰名与字母后的数字先按词拆分，GPUCache、TempState、Logs2 仍能命中。
+        长关键词与危险词保持子串匹配（危险词宁可多拦）。"""
+        short = [k for k in self.safe_keywords if len(k) < 5]
+        strict = sorted(set(short) | {k + "s" for k in short if not k.endswith("s")}, key=len, reverse=True)
+        loose = sorted((k for k in self.safe_keywords if len(k) >= 5), key=len, reverse=True)
+        parts = []
+        if strict: parts.append(r"(?<![a-z0-9])(?:%s)(?![a-z0-9])" % "|".join(map(re.escape, strict)))
+        if loose: parts.append("|".join(map(re.escape, loose)))
+        self._safe_re = re.compile("|".join(parts) or r"(?!)")
+        self._danger_re = re.compile("|".join(map(re.escape, self.danger_keywords)) or r"(?!)")
+        # 前瞻分组可取出所有（含重叠的）命中，再按 app_map 顺序取优先级最高者
+        self._app_re = re.compile("(?=(%s))" % "|".join(map(re.escape, self.app_map)))
+        self._app_rank = {k: i for i, k in enumerate(self.app_map)}
+        self._junk_name_cache = {}
+        self._app_info_cache = {}
+        self._pattern_lookups = {}
+
+    def _is_junk_dir_name(self, name):
+        hit = self._junk_name_cache.get(name)
+        if hit is None:
+            words = self._CAMEL_RE.sub(" ", name).lower()
+            hit = bool(self._safe_re.search(words)) and not self._danger_re.search(name.lower())
+            if len(self._junk_name_cache) > 100000: self._junk_name_cache = {}
+            self._junk_name_cache[name] = hit
+        return hit
+
+    def _reset_walk_stats(self):
+        with self._stats_lock:
+            self.walk_stats = {"entries": 0, "dirs": 0, "bytes": 0}
+
+    def _merge_walk_stats(self, stats):
+        with self._stats_lock:
+            for k in self.walk_stats: self.walk_stats[k] += stats.get(k, 0)
+
+    def _walk_stats_status(self):
+        ws = self.walk_stats
+        devices = self.io_limits.summary()
+        return {"type": "status", "msg": f"遍历 {ws['entries']} 项 / {ws['dirs']} 个目录，统计 {format_size(ws['bytes'])}" + (f"（并发 {devices}）" if devices else "")}
+
     def get_file_list(self, path, limit=100):
         """获取目录下的文件列表用于预览"""
         files = []
@@ -148,51 +494,114 @@ class SystemCleaner:
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = self.estimate_scan_total("junk")
+        self._reset_walk_stats()
         
         try:
-            rb_size = 0
-            for drive_idx in range(26):
-                drive = chr(ord('A') + drive_idx) + ":/"
-                root = os.path.join(drive, "$Recycle.Bin")
-                if os.path.exists(root): rb_size += self.get_dir_size_fast(root)
+            # 只读取每个删除项的 $I 记录（内含原大小），不再遍历 $R 内容
+            rb_items = self.recycle_bin_items()
+            rb_size = sum(rec["size"] for rec in rb_items)
             if rb_size > 0:
-                yield {"type": "item", "data": {"cat": "特别清理", "soft": "回收站", "detail": "已删除文件", "path": "RECYCLE_BIN_SPECIAL", "raw_size": rb_size, "display_size": format_size(rb_size)}}
+                yield {"type": "item", "data": {"cat": "特别清理", "soft": "回收站", "detail": f"已删除文件 ({len(rb_items)} 项)", "path": "RECYCLE_BIN_SPECIAL", "raw_size": rb_size, "display_size": format_size(rb_size)}}
         except: pass
 
         for item in self.base_targets:
+            if self._cancelled(): return
             self.scan_progress["current"] += 1
             yield {"type": "status", "msg": f"正在扫描: {item['path']}"}
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             if os.path.exists(item['path']):
-                s = self.get_dir_size_fast(item['path'])
+                s = self.tree_size(item['path'])
                 if s > 0: yield {"type": "item", "data": {"cat": item['cat'], "soft": item['soft'], "detail": item['name'], "path": item['path'], "raw_size": s, "display_size": format_size(s)}}
         
         # 扫描扩展应用
         for app in self.extended_app_targets:
+            if self._cancelled(): return
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             for base_path in app["paths"]:
                 if not os.path.exists(base_path): continue
                 if app["subs"]:
+                    # 同一应用目录下的子目标只在互相嵌套时共用大小树；并列的缓存子目录各自统计，不遍历整个应用目录
+                    roots = self._tree_roots([os.path.join(base_path, sub) for sub in app["subs"]])
                     for sub in app["subs"]:
                         full_path = os.path.join(base_path, sub)
                         if os.path.exists(full_path):
-                            s = self.get_dir_size_fast(full_path)
+                            s = self.tree_size(full_path, root=roots.get(os.path.normpath(full_path)))
                             if s > 0:
                                 yield {"type": "item", "data": {"cat": app["cat"], "soft": app["name"], "detail": sub, "path": full_path, "raw_size": s, "display_size": format_size(s)}}
+                elif app.get("huge"):
+                    item = self._sized_item({"cat": app["cat"], "soft": app["name"], "detail": os.path.basename(base_path)}, base_path)
+                    if item: yield item
                 else:
-                    s = self.get_dir_size_fast(base_path)
+                    s = self.tree_size(base_path)
                     if s > 0:
                         yield {"type": "item", "data": {"cat": app["cat"], "soft": app["name"], "detail": os.path.basename(base_path), "path": base_path, "raw_size": s, "display_size": format_size(s)}}
 
         # 扫描死链与无效快捷方式
         yield from self._scan_broken_shortcuts()
 
-        roots = [self.local_appdata, self.roaming_appdata]
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            futures = [ex.submit(self._scan_appdata_root, r) for r in roots]
-            for fut in as_completed(futures):
-                for r in fut.result(): yield r
+        # 按顶层应用目录分片，分片结果以紧凑元组返回
+        shards = self._appdata_shards([self.local_appdata, self.roaming_appdata])
+        for _, items in self._run_shards("appdata", shards):
+            for r in items: yield r
+        yield from self._drain_exact_updates()
+        yield self._walk_stats_status()
+
+    def _recycle_roots(self):
+        roots = []
+        for drive_idx in range(26):
+            root = os.path.join(chr(ord('A') + drive_idx) + ":/", "$Recycle.Bin")
+            if os.path.exists(root): roots.append(root)
+        return roots
+
+    def recycle_bin_items(self, roots=None, before=None, after=None, location=None):
+        """由 $I 记录列出回收站删除项；before / after 按删除时间（Unix 时间戳）筛选，location 按原位置目录筛选
+        （原路径总是 Windows 路径，统一用 ntpath 比较）"""
+        prefix = ntpath.normcase(ntpath.normpath(location)).rstrip("\\") if location else None
+        items = []
+        for root in (self._recycle_roots() if roots is None else roots):
+            for rec in utils.read_recycle_bin(root):
+                if before is not None and rec["deleted_at"] >= before: continue
+                if after is not None and rec["deleted_at"] < after: continue
+                if prefix:
+                    orig = ntpath.normcase(ntpath.normpath(rec["original_path"]))
+                    if orig != prefix and not orig.startswith(prefix + "\\"): continue
+                items.append(rec)
+        return items
+
+    def scan_recycle_bin(self, roots=None, before=None, after=None, location=None):
+        """回收站明细：按删除时间分组、按原位置目录归类，可逐项清理"""
+        self.scan_progress["start_time"] = time.time()
+        self.scan_progress["current"] = 0
+        self.scan_progress["total"] = 1
+        now = time.time()
+        items = self.recycle_bin_items(roots, before, after, location)
+        for rec in sorted(items, key=lambda r: -r["deleted_at"]):
+            if self._cancelled(): return
+            age = (now - rec["deleted_at"]) / 86400
+            cat = "今天删除" if age < 1 else "一周内删除" if age < 7 else "一月内删除" if age < 30 else "更早删除"
+            orig = rec["original_path"]
+            try: when = datetime.fromtimestamp(rec["deleted_at"]).strftime("%Y-%m-%d %H:%M")
+            except (OSError, OverflowError, ValueError): when = "未知时间"
+            yield {"type": "item", "data": {
+                "cat": cat,
+                "soft": ntpath.dirname(orig) or orig,
+                "detail": f"{ntpath.basename(orig) or orig} (删除于 {when})",
+                "path": rec["payload_path"],
+                "raw_size": rec["size"],
+                "display_size": format_size(rec["size"]),
+                "deleted_at": rec["deleted_at"],
+                "original_path": orig
+            }}
+        self.scan_progress["current"] = 1
+        yield {"type": "progress", "current": 1, "total": 1, "start_time": self.scan_progress["start_time"]}
+
+    def _recycle_info_path(self, path):
+        """回收站内容文件 $R 对应的 $I 记录路径；不在回收站内时返回 None"""
+        name = os.path.basename(path)
+        sid = os.path.dirname(path)
+        if not name.upper().startswith("$R") or os.path.basename(os.path.dirname(sid)).lower() != "$recycle.bin": return None
+        return os.path.join(sid, "$I" + name[2:])
 
     def _scan_broken_shortcuts(self):
         """扫描桌面和开始菜单的无效快捷方式"""
@@ -206,32 +615,209 @@ class SystemCleaner:
             except: pass
         return []
 
-    def _scan_appdata_root(self, root):
+    def _appdata_shards(self, roots):
+        shards = []
+        for root in roots:
+            if not os.path.exists(root): continue
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        if entry.is_dir(): shards.append((entry.name, entry.path))
+            except: pass
+        return shards
+
+    def _scan_appdata_entry(self, name, path):
         res = []
-        if not os.path.exists(root): return res
+        hits, stats = [], {}
         try:
-            with os.scandir(root) as it:
-                for entry in it:
-                    if not entry.is_dir(): continue
-                    try:
-                        for dp, dn, fn in os.walk(entry.path):
-                            if dp.count(os.sep) - entry.path.count(os.sep) > 3: dn[:]=[]; continue
-                            cur = os.path.basename(dp).lower()
-                            if any(k in cur for k in self.safe_keywords) and not any(k in cur for k in self.danger_keywords):
-                                cat, soft = self.infer_info(entry.name, dp)
-                                s = self.get_dir_size_fast(dp)
-                                if s > 0:
-                                    res.append({"type": "item", "data": {"cat": cat, "soft": soft, "detail": os.path.basename(dp), "path": dp, "raw_size": s, "display_size": format_size(s)}})
-                                dn[:] = []
-                    except: pass
+            # 深度限制与原 os.walk 一致：应用目录自身为第 0 层，最多检查到第 3 层
+            hits, stats = self.walk_and_size(path, self._is_junk_dir_name, max_depth=3)
+            for dp, _, s in hits:
+                if s > 0:
+                    cat, soft = self.infer_info(name, dp)
+                    res.append({"type": "item", "data": {"cat": cat, "soft": soft, "detail": os.path.basename(dp), "path": dp, "raw_size": s, "display_size": format_size(s)}})
         except: pass
-        return res
+        return res, stats
+
+    def _scan_shard(self, kind, arg):
+        """扫描单个分片，返回 ([(cat, soft, detail, path, raw_size), ...], 遍历统计)；线程与进程后端共用"""
+        stats = {}
+        if kind == "appdata": items, stats = self._scan_appdata_entry(*arg)
+        elif kind == "radar": items = self._radar_scan_sub_folder(arg, self.radar_targets)
+        else: items = []
+        return [(d["cat"], d["soft"], d["detail"], d["path"], d["raw_size"]) for d in (i["data"] for i in items)], stats
+
+    def _get_process_pool(self):
+        if self._proc_pool is None:
+            self._proc_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 4, initializer=_process_worker_init)
+        return self._proc_pool
+
+    def shutdown_exact_pool(self):
+        """关闭回填精确大小的后台线程池，未开始的统计直接丢弃"""
+        if self._exact_pool is not None:
+            self._exact_pool.shutdown(wait=False, cancel_futures=True)
+            self._exact_pool = None  # 各扫描令牌上被撤销的 future 在回填时跳过
+
+    def shutdown_process_pool(self):
+        if self._proc_pool is not None:
+            self._proc_pool.shutdown(wait=False)
+            self._proc_pool = None
+
+    def _run_shards(self, kind, shards):
+        """按 scan_backend 并行执行分片，每完成一个分片产出 (分片, item 消息列表)；
+        线程后端下每个分片占用其所在设备的一个并发槽位"""
+        paths = [sh[1] if kind == "appdata" else sh for sh in shards]
+        if self.scan_backend == "process":
+            ex = self._get_process_pool()
+            if self.size_index is None: futures = {ex.submit(_process_shard, kind, sh): sh for sh in shards}
+            else:
+                keys = self.size_index.keys()
+                futures = {ex.submit(_process_shard, kind, sh, self._index_slice(keys, p)): sh for p, sh in zip(paths, shards)}
+            yield from self._collect_shards(futures, from_process=True)
+        else:
+            with self._executor(self.io_limits.pool_size(paths)) as ex:
+                futures = {ex.submit(self.io_limits.run, p, self._scan_shard, kind, sh): sh for p, sh in zip(paths, shards)}
+                yield from self._collect_shards(futures)
+
+    def _index_slice(self, keys, path):
+        """大小索引中 path 及其子孙目录的记录（keys 为已排序的全部键），随分片发给工作进程"""
+        path = os.path.normpath(path)
+        lo, hi = bisect.bisect_left(keys, path + os.sep), bisect.bisect_left(keys, path + os.sep + "\U0010ffff")
+        entries = self.size_index.entries
+        part = {k: entries[k] for k in keys[lo:hi] if k in entries}
+        if path in entries: part[path] = entries[path]
+        return part
+
+    def _collect_shards(self, futures, from_process=False):
+        for fut in self._iter_completed(futures):
+            try:
+                res = fut.result()
+                if from_process:
+                    # 工作进程更新过的索引切片合并回本进程的持久索引，下次扫描仍可命中
+                    res, entries = res
+                    if entries and self.size_index is not None: self.size_index.merge(entries)
+                rows, stats = res
+            except: rows, stats = [], {}
+            self._merge_walk_stats(stats)
+            yield futures[fut], [{"type": "item", "data": {"cat": c, "soft": so, "detail": de, "path": p, "raw_size": sz, "display_size": format_size(sz)}} for c, so, de, p, sz in rows]
+
+    def _iter_completed(self, futures):
+        """as_completed 的可取消版本：取消后撤销尚未开始的任务并停止产出"""
+        pending = set(futures)
+        while pending:
+            if self._cancelled():
+                for f in pending: f.cancel()
+                return
+            done = [f for f in pending if f.done()]
+            if not done:
+                try: done = [next(as_completed(pending, timeout=0.2))]
+                except Exception: continue
+            for f in done:
+                pending.discard(f)
+                yield f
+
+    def cancel_token(self):
+        """当前线程所属扫描的取消令牌；未绑定的线程取最近一次扫描的令牌"""
+        return getattr(self._scan_local, "token", None) or self.cancel_event
+
+    def bind_scan(self, token):
+        """把取消令牌绑定到当前线程（扫描线程及其线程池的工作线程）"""
+        self._scan_local.token = token
+
+    def _cancelled(self):
+        return self.cancel_token().is_set()
+
+    def cancel_scan(self, token=None):
+        """请求停止扫描（默认最近一次；协作式，正在统计的目录会在下一个目录边界退出）"""
+        (token or self.cancel_event).set()
+
+    def new_scan(self):
+        """开始一次新扫描：发放新的取消令牌，旧扫描的令牌保持置位；返回的令牌交给扫描线程 bind_scan"""
+        self.cancel_event = ScanToken()
+        return self.cancel_event
+
+    def _executor(self, workers):
+        """扫描内部的线程池：工作线程继承发起线程的取消令牌"""
+        return ThreadPoolExecutor(max_workers=workers, initializer=self.bind_scan, initargs=(self.cancel_token(),))
+
+    def _run_bound(self, token, fn, *args):
+        self.bind_scan(token)
+        return fn(*args)
+
+    async def scan_async(self, scan_name, *args, timeout=None, grace=2.0):
+        """scan_* 生成器的异步外观：async for msg in cleaner.scan_async("scan_generator")。
+        任务被取消、调用方提前退出迭代或超过 timeout 秒时置位本次扫描的令牌，并最多等待 grace 秒
+        让后台扫描线程收尾；超时抛出 asyncio.TimeoutError。"""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        token = self.new_scan()
+
+        def post(msg):
+            try: loop.call_soon_threadsafe(queue.put_nowait, msg)
+            except RuntimeError: pass  # 事件循环已关闭
+
+        def pump():
+            self.bind_scan(token)
+            try:
+                for msg in getattr(self, scan_name)(*args):
+                    if token.is_set(): break
+                    post(msg)
+            except Exception as e:
+                post({"type": "status", "msg": f"扫描出错: {e}"})
+            finally:
+                post(done)
+
+        worker = threading.Thread(target=pump, daemon=True)
+        worker.start()
+        deadline = None if timeout is None else loop.time() + timeout
+        finished = False
+        try:
+            while True:
+                wait = None if deadline is None else deadline - loop.time()
+                if wait is not None and wait <= 0: raise asyncio.TimeoutError()
+                msg = await asyncio.wait_for(queue.get(), wait)
+                if msg is done:
+                    finished = True
+                    break
+                yield msg
+        finally:
+            if not finished:
+                self.cancel_scan(token)
+                await loop.run_in_executor(None, worker.join, grace)
 
     def scan_social_apps(self):
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = self.estimate_scan_total("social")
         
+        search_roots, social_targets = self._social_roots()
+        unique_tasks = {p: n for n, p in search_roots}
+        with self._executor(self.io_limits.pool_size(list(unique_tasks))) as executor:
+            futures = [executor.submit(self.io_limits.run, path, self._analyze_social_detailed, path, name, social_targets) for path, name in unique_tasks.items()]
+            # 类型识别按账号作为独立任务提交到同一线程池（各占一个设备槽位），文件清单来自统计大小时的同一次遍历
+            classify = {}
+            for fut in self._iter_completed(futures):
+                self.scan_progress["current"] += 1
+                yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
+                items = fut.result()
+                if not self.classify_social:
+                    for item in items: yield item
+                    continue
+                accounts = {}
+                for item in items: accounts.setdefault(item["data"]["cat"], []).append(item["data"])
+                for datas in accounts.values():
+                    classify[executor.submit(self.io_limits.run, datas[0]["path"], self._classify_account, datas)] = datas
+            if classify: yield {"type": "status", "msg": f"正在识别 {len(classify)} 个账号的文件类型..."}
+            for fut in self._iter_completed(classify):
+                try: fut.result()
+                except Exception: pass
+                for data in classify[fut]:
+                    data.pop("files", None)
+                    yield {"type": "item", "data": data}
+
+    def _social_roots(self):
+        """定位社交软件数据根目录（注册表配置 + 文档 / Tencent 常见位置），返回 ([(软件名, 根目录)], 目标定义)"""
         search_roots = []
         reg_configs = [
             (r"Software\Tencent\WeChat", "FileSavePath", "微信 WeChat"),
@@ -246,15 +832,9 @@ class SystemCleaner:
                 winreg.CloseKey(k)
             except: pass
 
-        bitmask = ctypes.windll.kernel32.GetLogicalDrives()
-        drives = []
-        for i in range(26):
-            if bitmask & (1 << i):
-                drive_p = chr(ord('A') + i) + ":/"
-                if ctypes.windll.kernel32.GetDriveTypeW(drive_p) == 3: drives.append(drive_p)
-
         docs = ctypes.create_unicode_buffer(1024)
-        ctypes.windll.shell32.SHGetSpecialFolderPathW(None, docs, 0x0005, False)
+        if WINDLL is not None: WINDLL.shell32.SHGetSpecialFolderPathW(None, docs, 0x0005, False)
+        else: docs.value = os.path.join(self.user_profile, "Documents")
         common_bases = [docs.value, os.path.join(os.environ['APPDATA'], "Tencent"), os.path.join(os.environ['LOCALAPPDATA'], "Tencent")]
         
         social_targets = [
@@ -268,14 +848,21 @@ class SystemCleaner:
                 for rn in t['root_names']:
                     full = os.path.join(base, rn)
                     if os.path.exists(full): search_roots.append((t['name'], full))
+        return search_roots, social_targets
 
-        unique_tasks = {p: n for n, p in search_roots}
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = [executor.submit(self._analyze_social_detailed, path, name, social_targets) for path, name in unique_tasks.items()]
-            for fut in as_completed(futures):
-                self.scan_progress["current"] += 1
-                yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
-                for item in fut.result(): yield item
+    def _social_image_dirs(self):
+        """各社交软件账号下的图片缓存目录"""
+        search_roots, social_targets = self._social_roots()
+        dirs = []
+        for root, name in {p: n for n, p in search_roots}.items():
+            target = next((t for t in social_targets if t['name'] == name), None)
+            try:
+                for entry in os.scandir(root):
+                    if entry.is_dir() and entry.name not in ["All Users", "Applet", "config"]:
+                        sub = os.path.join(entry.path, target['subs']["图片缓存"])
+                        if os.path.isdir(sub): dirs.append(sub)
+            except: pass
+        return dirs
 
     def _analyze_social_detailed(self, root, app_name, targets):
         res = []
@@ -288,62 +875,228 @@ class SystemCleaner:
                         for label, sub_p in target['subs'].items():
                             full_sub = os.path.join(entry.path, sub_p)
                             if os.path.exists(full_sub):
-                                s = self.get_dir_size_fast(full_sub)
+                                files = [] if self.classify_social else None
+                                prof = self.social_age_profile(full_sub, files)
+                                if prof is None: return res  # 已取消：不把不完整的统计当作真实大小上报
+                                s, hist, units = prof
                                 if s > 0:
+                                    months = sorted(hist)
+                                    span = f" ({months[0]} ~ {months[-1]})" if len(months) > 1 else (f" ({months[0]})" if months else "")
                                     res.append({"type": "item", "data": {
                                         "cat": f"{app_name} ({entry.name})", 
                                         "soft": label, 
-                                        "detail": f"{label}目录", "path": full_sub, 
-                                        "raw_size": s, "display_size": format_size(s)
+                                        "detail": f"{label}目录{span}", "path": full_sub, 
+                                        "raw_size": s, "display_size": format_size(s),
+                                        "age_hist": hist, "age_units": units, "files": files
                                     }})
         except: pass
         return res
 
+    def _classify_account(self, datas):
+        """识别同一账号各分类目录内文件的真实类型（在已占设备槽位的任务内串行分批读取文件头，每批检查取消）：
+        同一账号的 .dat 一起投票求异或密钥，结果写回条目（type_totals: {类型: 字节}，xor_key），详情附上占比最大的几种类型。
+        文件清单为 social_age_profile 遍历时收集的 data["files"]"""
+        paths, sizes, owners = [], [], []
+        for idx, data in enumerate(datas):
+            for path, size in data.get("files") or ():
+                paths.append(path); sizes.append(size); owners.append(idx)
+        n, heads = self.SNIFF_BYTES, []
+        for i in range(0, len(paths), self.SNIFF_BATCH):
+            if self._cancelled(): return
+            buf = utils.read_heads(paths[i:i + self.SNIFF_BATCH], n)
+            heads += [buf[j:j + n] for j in range(0, len(buf), n)]
+        types, key = self._types_from_heads(heads, paths)
+        totals = [{} for _ in datas]
+        for path, size, idx, kind in zip(paths, sizes, owners, types):
+            if kind in ("jpg", "png", "gif", "webp") and f"{os.sep}Thumb{os.sep}" in path: kind = "缩略图"
+            totals[idx][kind] = totals[idx].get(kind, 0) + size
+        for data, tt in zip(datas, totals):
+            data["type_totals"] = tt
+            if key: data["xor_key"] = key
+            top = sorted(tt.items(), key=lambda kv: -kv[1])[:3]
+            if top: data["detail"] += " · " + " / ".join(f"{k} {format_size(v)}" for k, v in top)
+
+    def classify_files(self, paths, key=None):
+        """按文件头识别真实类型：每个文件只读开头 SNIFF_BYTES 字节，按 SNIFF_BATCH 分批交给线程池，不读文件内容；
+        微信 .dat 图片按单字节异或混淆，key 为 None 时由这批 .dat 的头部投票得出。返回 (与 paths 对齐的类型列表, 密钥)"""
+        n, batch = self.SNIFF_BYTES, self.SNIFF_BATCH
+        chunks = [paths[i:i + batch] for i in range(0, len(paths), batch)]
+        if not chunks: return [], key
+        with self._executor(self.io_limits.pool_size([c[0] for c in chunks])) as executor:
+            buf = b"".join(executor.map(lambda c: self.io_limits.run(c[0], utils.read_heads, c, n, sample=True), chunks))
+        return self._types_from_heads([buf[i:i + n] for i in range(0, len(buf), n)], paths, key)
+
+    def _types_from_heads(self, heads, paths, key=None):
+        types = [utils.classify_magic(h, p) for h, p in zip(heads, paths)]
+        dat = [i for i, p in enumerate(paths) if types[i] == "other" and p[-4:].lower() == ".dat"]
+        if key is None: key = utils.guess_xor_key(heads[i] for i in dat)
+        if key:
+            table = bytes(b ^ key for b in range(256))
+            for i in dat: types[i] = utils.classify_magic(heads[i].translate(table), paths[i][:-4])
+        return types, key
+
+    def social_age_profile(self, path, files=None):
+        """一次遍历统计目录内容的按月分布，返回 (总大小, {"YYYY-MM": 字节}, 清理单元 [(路径, 时间戳, 大小, 月份)])，扫描被取消时返回 None。
+        微信按月归档的 YYYY-MM 子目录整体作为一个单元（时间戳取次月月初，大小经目录大小索引 / 大小树求得）；
+        其余子目录同样整体作为一个单元，大小经索引求得，时间戳取子树内最新的目录修改时间（新增、删除文件都会更新所在目录的
+        修改时间，早于该时间的子树内不会有更新的文件）；直接位于各层的文件各自作为单元，按修改时间计月。
+        给定 files 列表时同时收集每个文件的 (路径, 大小) 供类型识别使用，此时所有子目录都逐个列举"""
+        total, hist, units = 0, {}, []
+        stack = [path]
+        while stack:
+            if self._cancelled(): return None
+            try: entries = utils.list_dir(stack.pop())
+            except OSError: continue
+            for e in entries:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        m = MONTH_DIR_RE.match(e.name)
+                        if m:
+                            y, mo = int(m.group(1)), int(m.group(2))
+                            size = self.get_dir_size_fast(e.path) if files is None else self._list_files(e.path, files)
+                            key, ts = e.name, datetime(y + mo // 12, mo % 12 + 1, 1).timestamp()
+                        elif files is not None: stack.append(e.path); continue
+                        else:
+                            size, ts = self.get_dir_size_fast(e.path), self._newest_dir_mtime(e.path)
+                            key = time.strftime("%Y-%m", time.localtime(ts))
+                    else:
+                        st = e.stat(follow_symlinks=False)
+                        size, ts = st.st_size, st.st_mtime
+                        key = time.strftime("%Y-%m", time.localtime(ts))
+                        if files is not None: files.append((e.path, size))
+                except (OSError, ValueError, OverflowError): continue
+                total += size
+                hist[key] = hist.get(key, 0) + size
+                units.append((e.path, ts, size, key))
+        return None if self._cancelled() else (total, hist, units)
+
+    def _newest_dir_mtime(self, path):
+        """子树内最新的目录修改时间；子目录清单取自目录大小索引，只 stat 目录本身"""
+        newest, stack = os.stat(path).st_mtime, [path]
+        while stack and not self._cancelled():
+            d = stack.pop()
+            try: newest = max(newest, os.stat(d).st_mtime)
+            except OSError: continue
+            stack.extend(self._visit_dir(d)[2])
+        return newest
+
+    def _list_files(self, path, files):
+        """遍历 path 下全部文件，把 (路径, 大小) 追加到 files，返回总大小"""
+        total = 0
+        for _, entries, _ in walk_ordered(path):
+            if self._cancelled(): break
+            for e in entries:
+                try: size = e.stat(follow_symlinks=False).st_size
+                except OSError: continue
+                files.append((e.path, size)); total += size
+        return total
+
+    def clean_older_than(self, units, days):
+        """按扫描时记录的清理单元删除早于 N 天的内容，不重新扫描；返回 (释放字节, 错误数, 保留的单元)"""
+        cutoff = time.time() - days * 86400
+        freed, errs, kept = 0, 0, []
+        for unit in units:
+            path, ts = unit[0], unit[1]
+            if ts >= cutoff: kept.append(unit); continue
+            self._drop_size_trees(path)
+            ds, e = self._remove_path(path)
+            freed += ds; errs += e
+            if e: kept.append(unit)
+        return freed, errs, kept
+
     def scan_resignation_targets(self, custom_paths=[]):
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = self.estimate_scan_total("resign")
         
-        bitmask = ctypes.windll.kernel32.GetLogicalDrives()
-        drives = []
-        for i in range(26):
-            if bitmask & (1 << i):
-                drive_p = chr(ord('A') + i) + ":/"
-                if ctypes.windll.kernel32.GetDriveTypeW(drive_p) == 3: drives.append(drive_p)
-
-        app_targets = [
-            {"name": "微信 WeChat", "patterns": ["WeChat Files"], "cat": "通讯软件"},
-            {"name": "企业微信 WeCom", "patterns": ["WXWork"], "cat": "通讯软件"},
-            {"name": "腾讯 QQ", "patterns": ["Tencent Files", "TencentFiles"], "cat": "通讯软件"},
-            {"name": "钉钉 DingTalk", "patterns": ["DingTalk"], "cat": "办公软件"},
-            {"name": "飞书 Feishu", "patterns": ["Feishu", "Lark"], "cat": "办公软件"}
-        ]
+        drives = _fixed_drives()
 
-        scan_tasks = []
-        for d in drives:
-            try:
-                with os.scandir(d) as it:
-                    for entry in it:
-                        if entry.is_dir() and entry.name.lower() not in self.SYSTEM_EXCLUDE:
-                            scan_tasks.append(entry.path)
-                scan_tasks.append(d)
-            except: pass
+        # 由各盘目录名索引直接查出任意深度的目标目录，分片只统计命中目录下的账号
+        yield {"type": "status", "msg": "正在刷新目录名索引..."}
+        scan_tasks = [path for path, _ in self.radar_find(drives, self.radar_targets)]
+        if self._cancelled(): return
 
-        with ThreadPoolExecutor(max_workers=24) as executor:
-            futures = [executor.submit(self._radar_scan_sub_folder, path, app_targets) for path in scan_tasks]
-            for fut in as_completed(futures):
-                self.scan_progress["current"] += 1
-                yield {"type": "progress", "current": self.scan_progress["current"], "total": max(self.scan_progress["total"], len(scan_tasks)), "start_time": self.scan_progress["start_time"]}
-                for item in fut.result(): yield item
+        for _, items in self._run_shards("radar", scan_tasks):
+            self.scan_progress["current"] += 1
+            yield {"type": "progress", "current": self.scan_progress["current"], "total": max(self.scan_progress["total"], len(scan_tasks)), "start_time": self.scan_progress["start_time"]}
+            for item in items: yield item
 
+        if self._cancelled(): return
         for item in self._scan_resignation_privacy_full(): yield item
+        if self.secret_scan: yield from self.scan_secrets()
 
         yield {"type": "item", "data": { "cat": "网络隐私", "soft": "Network Traces", "detail": "DNS/ARP/共享记录历史", "path": "NETWORK_TRACES_SPECIAL", "raw_size": 1024, "display_size": "1.00 KB" }}
 
         for cp in custom_paths:
+            if self._cancelled(): return
             if os.path.exists(cp):
-                s = self.get_dir_size_fast(cp)
-                yield {"type": "item", "data": { "cat": "自定义敏感目录", "soft": "手动添加", "detail": os.path.basename(cp), "path": cp, "raw_size": s, "display_size": format_size(s) }}
+                item = self._sized_item({"cat": "自定义敏感目录", "soft": "手动添加", "detail": os.path.basename(cp)}, cp, min_size=-1)
+                if item: yield item
+        yield from self._drain_exact_updates()
+
+    def _secret_roots(self):
+        if self.secret_roots: return [(os.path.basename(os.path.normpath(r)) or r, r) for r in self.secret_roots]
+        return [("桌面", os.path.join(self.user_profile, "Desktop")), ("文档", os.path.join(self.user_profile, "Documents"))]
+
+    def scan_secrets(self, roots=None):
+        """在桌面 / 文档等目录的文本文件中查找明文私钥、访问密钥、令牌与带口令的连接串，命中文件作为可粉碎条目产出。
+        内容未变化（大小 + mtime + inode 一致）的文件直接取 HashCache 中的上次结果；其余文件分批交给线程池，
+        每个文件先嗅探前缀跳过二进制，再用 mmap 分块、锚点预筛后运行正则"""
+        roots = roots or self._secret_roots()
+        skip_dirs = {'.git', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', 'site-packages'}
+        pending, stats = [], {"files": 0, "cached": 0, "bytes": 0, "hits": 0}
+        t0 = time.perf_counter()
+
+        def item(label, path, size, labels):
+            stats["hits"] += 1
+            return {"type": "item", "data": {
+                "cat": "明文凭据", "soft": label,
+                "detail": f"{os.path.basename(path)} · {', '.join(labels)}",
+                "path": path, "raw_size": size, "display_size": format_size(size), "secrets": labels
+            }}
+
+        for label, root in roots:
+            if not os.path.isdir(root): continue
+            yield {"type": "status", "msg": f"正在扫描明文凭据: {root}"}
+            for _, files, subdirs in walk_ordered(root, self._seek_ordered(root)):
+                if self._cancelled(): return
+                subdirs[:] = [d for d in subdirs if d.name.lower() not in skip_dirs]
+                for e in files:
+                    if os.path.splitext(e.name)[1].lower() in utils.SECRET_SKIP_EXTS: continue
+                    try: st = e.stat(follow_symlinks=False)
+                    except OSError: continue
+                    if not 0 < st.st_size <= self.secret_max_size: continue
+                    stats["files"] += 1
+                    cached = self.hash_cache.get(self.SECRET_CACHE_KIND, e.path, st) if self.hash_cache is not None else None
+                    if cached is not None:
+                        stats["cached"] += 1
+                        if cached: yield item(label, e.path, st.st_size, cached.split("|"))
+                        continue
+                    pending.append((label, e.path, st))
+
+        batches = [pending[i:i + self.SECRET_BATCH] for i in range(0, len(pending), self.SECRET_BATCH)]
+        jobs = [[(path, st.st_size) for _, path, st in b] for b in batches]
+
+        def collect(futures):
+            for fut in self._iter_completed(futures):
+                try: results = fut.result()
+                except Exception: continue
+                for (label, path, st), labels in zip(futures[fut], results):
+                    if labels is None: continue  # 读取失败（被占用等）不写缓存，下次重试
+                    stats["bytes"] += st.st_size
+                    if self.hash_cache is not None: self.hash_cache.put(self.SECRET_CACHE_KIND, path, st, "|".join(labels))
+                    if labels: yield item(label, path, st.st_size, labels)
+
+        # 正则匹配持有 GIL：线程池只能让读盘与匹配重叠，多核并行需选用多进程扫描后端
+        if batches and self.scan_backend == "process":
+            ex = self._get_process_pool()
+            yield from collect({ex.submit(_scan_secret_batch, job): b for job, b in zip(jobs, batches)})
+        elif batches:
+            with self._executor(self.io_limits.pool_size([b[0][1] for b in batches])) as ex:
+                yield from collect({ex.submit(self.io_limits.run, b[0][1], _scan_secret_batch, job): b for job, b in zip(jobs, batches)})
+        elapsed = time.perf_counter() - t0
+        yield {"type": "status", "msg": f"明文凭据: 检查 {stats['files']} 个文件（{stats['cached']} 个未变化跳过），读取 {format_size(stats['bytes'])}，"
+                                         f"{stats['bytes'] / max(elapsed, 1e-9) / 1048576:.0f} MB/s，命中 {stats['hits']} 个"}
 
     def _scan_resignation_privacy_full(self):
         results = []
@@ -359,13 +1112,13 @@ class SystemCleaner:
         }
         for b_name, b_path in browsers.items():
             if os.path.exists(b_path):
-                for root, dirs, files in os.walk(b_path):
-                    if "Login Data" in files or "Cookies" in files:
-                        for target in ["Login Data", "Cookies", "History", "Web Data"]:
-                            fp = os.path.join(root, target)
-                            if os.path.exists(fp):
-                                results.append({"type": "item", "data": { "cat": "浏览器隐私", "soft": b_name, "detail": f"凭据库: {target}", "path": fp, "raw_size": os.path.getsize(fp), "display_size": format_size(os.path.getsize(fp)) }})
-                    if root.count(os.sep) - b_path.count(os.sep) > 2: dirs[:] = []; continue
+                # 配置文件由 Local State 列出；新版 Cookies 位于配置文件下的 Network 子目录
+                for dir_name, display in utils.chromium_profiles(b_path):
+                    for target in ["Login Data", "Cookies", "Network/Cookies", "History", "Web Data"]:
+                        fp = os.path.normpath(os.path.join(b_path, dir_name, target))
+                        try: sz = os.path.getsize(fp)
+                        except OSError: continue
+                        results.append({"type": "item", "data": { "cat": "浏览器隐私", "soft": b_name if dir_name == "Default" else f"{b_name} · {display}", "detail": f"凭据库: {target}", "path": fp, "raw_size": sz, "display_size": format_size(sz) }})
 
         dev_tools = [
             ("SSH 密钥", os.path.join(up, ".ssh"), "私钥(id_rsa)", "开发凭据"),
@@ -407,21 +1160,76 @@ class SystemCleaner:
 
         return results
 
+    def name_index(self, root):
+        with self._name_index_lock:
+            idx = self.name_indexes.get(root)
+            if idx is None: idx = self.name_indexes[root] = NameIndex(root, self.SYSTEM_EXCLUDE)
+        return idx
+
+    def refresh_name_indexes(self, roots, force=False):
+        """并发刷新超过有效期的磁盘目录名索引（每盘占一个设备槽位）并保存"""
+        stale = [self.name_index(r) for r in roots]
+        stale = [i for i in stale if force or not len(i) or time.time() - i.refreshed > self.name_index_ttl]
+        if not stale: return
+        token = self.cancel_token()
+        def refresh(idx):
+            if idx.refresh(token): idx.save()
+        with self._executor(len(stale)) as executor:
+            list(executor.map(lambda i: self.io_limits.run(i.root, refresh, i), stale))
+
+    def radar_find(self, roots, targets):
+        """在各盘目录名索引中查找目标目录名，返回 [(路径, 目标)]；独特目录名（deep）任意深度，通用名限
+        RADAR_SHALLOW_DEPTH 层以内（与原先“盘符下一级目录及其子目录”的雷达范围一致）；已命中目录之下的同名目录不再重复报告"""
+        self.refresh_name_indexes(roots)
+        lookup = self._pattern_lookup(targets)
+        hits, seen = [], set()
+        for r in roots:
+            # find 按路径排序，祖先目录总在后代之前
+            for path, name in self.name_index(r).find(lookup):
+                depth = len(os.path.relpath(path, r).replace("\\", "/").split("/"))
+                if not lookup[name].get("deep") and depth > self.RADAR_SHALLOW_DEPTH: continue
+                up = os.path.dirname(path)
+                while up not in seen and os.path.dirname(up) != up: up = os.path.dirname(up)
+                if up in seen: continue
+                seen.add(path)
+                hits.append((path, lookup[name]))
+        return hits
+
+    def clear_name_indexes(self):
+        with self._name_index_lock:
+            for idx in self.name_indexes.values(): idx.clear()
+            self.name_indexes = {}
+        for path, _ in NameIndex.index_files():
+            try: os.remove(path)
+            except OSError: pass
+
     def _radar_scan_sub_folder(self, folder_path, targets):
         results = []
         try:
-            folder_name = os.path.basename(folder_path).lower()
-            for target in targets:
-                if any(p.lower() == folder_name for p in target['patterns']):
-                    return self._extract_account_folders(folder_path, target)
+            lookup = self._pattern_lookup(targets)
+            target = lookup.get(os.path.basename(folder_path).lower())
+            if target: return self._extract_account_folders(folder_path, target)
             with os.scandir(folder_path) as it:
                 for entry in it:
-                    if entry.is_dir() and any(p.lower() == entry.name.lower() for t in targets for p in t['patterns']):
-                        target = next(t for t in targets if any(p.lower() == entry.name.lower() for p in t['patterns']))
+                    target = lookup.get(entry.name.lower())
+                    if target and entry.is_dir():
                         results.extend(self._extract_account_folders(entry.path, target))
         except: pass
         return results
 
+    def _pattern_lookup(self, targets):
+        """小写目录名 -> 目标（先出现的目标优先）。按目标列表的内容缓存：键为各目标的 (id, 关键词)，缓存项同时持有
+        目标本身，其 id 在缓存存续期间不会被新对象复用；临时拼出的目标列表内容相同即命中，修改关键词后自然失效"""
+        key = tuple((id(t), tuple(t['patterns'])) for t in targets)
+        hit = self._pattern_lookups.get(key)
+        if hit is None:
+            lookup = {}
+            for t in reversed(targets):
+                for p in t['patterns']: lookup[p.lower()] = t
+            if len(self._pattern_lookups) >= 64: self._pattern_lookups = {}
+            hit = self._pattern_lookups[key] = (list(targets), lookup)
+        return hit[1]
+
     def _extract_account_folders(self, root_path, target):
         accounts = []
         exclude = ["All Users", "Applet", "config", "temp", "logs", "cache"]
@@ -436,6 +1244,7 @@ class SystemCleaner:
         return accounts
 
     def shred_item(self, path):
+        self._drop_size_trees(path)
         if path == "WINDOWS_VAULT_SPECIAL":
             subprocess.run("cmdkey /list | findstr /i \"target\" > %temp%\\v.txt", shell=True)
             return 1024, 0
@@ -445,48 +1254,87 @@ class SystemCleaner:
             subprocess.run("net use * /delete /y", shell=True, capture_output=True)
             return 1024, 0
             
-        if not os.path.exists(path): return 0, 0
-        total_freed = 0
-        try:
-            if os.path.isfile(path):
-                sz = os.path.getsize(path)
-                with open(path, "ba+", buffering=0) as f: f.write(os.urandom(min(sz, 1024*1024)))
-                os.remove(path); return sz, 0
-            for r, d, f in os.walk(path, topdown=False):
-                for file in f:
-                    fp = os.path.join(r, file)
-                    try:
-                        fsz = os.path.getsize(fp)
-                        with open(fp, "ba+", buffering=0) as f_o: f_o.write(os.urandom(min(fsz, 512*1024)))
-                        os.remove(fp); total_freed += fsz
-                    except: pass
-                for dir_n in d:
-                    try: os.rmdir(os.path.join(r, dir_n))
-                    except: pass
-            os.rmdir(path)
-        except: return 0, 1
-        return total_freed, 0
+        if not os.path.lexists(path): return 0, 0
+        # 文件按目录批量、按磁盘位置顺序收集，整体交给覆写引擎；目录最后自底向上移除
+        # 符号链接与联接点（含 path 自身）只删除链接本身，绝不覆写或进入其指向的位置
+        files, dirs, links = [], [], []
+        def is_link(e):
+            try: return e.is_symlink() or getattr(e.stat(follow_symlinks=False), "st_file_attributes", 0) & 0x400
+            except OSError: return False
+        try: top = os.lstat(path)
+        except OSError: return 0, 1
+        if stat.S_ISLNK(top.st_mode) or getattr(top, "st_file_attributes", 0) & 0x400: links.append(path)
+        elif stat.S_ISDIR(top.st_mode):
+            for r, entries, subdirs in walk_ordered(path, self._seek_ordered(path)):
+                dirs.append(r)
+                links.extend(d.path for d in subdirs if is_link(d))
+                subdirs[:] = [d for d in subdirs if not is_link(d)]
+                for e in entries: (links if is_link(e) else files).append(e.path)
+        else: files.append(path)
+        engine = utils.ShredEngine(self.shred_passes, self.shred_fsync_batch, self.shred_verify)
+        total_freed, errs = 0, 0
+        for _, size, _, ok in engine.shred(files):
+            if ok: total_freed += size
+            else: errs += 1
+        for link in links:
+            try: os.remove(link)
+            except OSError:
+                try: os.rmdir(link)
+                except OSError: errs += 1
+        for r in reversed(dirs):
+            try: os.rmdir(r)
+            except OSError: pass
+        with self._stats_lock:
+            st = self.shred_stats
+            st["files"] += engine.files; st["bytes"] += engine.bytes; st["seconds"] += engine.seconds; st["errors"] += engine.errors
+            st["ended"] = time.perf_counter()
+        return total_freed, errs
+
+    def reset_shred_stats(self):
+        """开始一轮粉碎：seconds 为各文件耗时之和（多个 shred_item 并发时会重叠），吞吐按 started ~ ended 的墙钟时间计算"""
+        now = time.perf_counter()
+        with self._stats_lock: self.shred_stats = {"files": 0, "bytes": 0, "seconds": 0.0, "errors": 0, "started": now, "ended": now}
+
+    def shred_summary(self):
+        st = self.shred_stats
+        rate = st["bytes"] / max(st["ended"] - st["started"], 1e-9) / 1048576
+        return f"覆写 {st['files']} 个文件（{self.shred_passes} 遍），写入 {format_size(st['bytes'])}，{rate:.0f} MB/s" + (f"，{st['errors']} 个失败" if st["errors"] else "")
 
     def delete_item(self, path):
+        self._drop_size_trees(path)
         if path == "RECYCLE_BIN_SPECIAL":
             try: return 0, 0 if ctypes.windll.shell32.SHEmptyRecycleBinW(None, None, 7) == 0 else 1
             except: return 0, 1
         if path == "CLIPBOARD_SPECIAL":
             self.clear_clipboard_history()
             return 1024, 0
+        info = self._recycle_info_path(path)
+        if info:
+            # 回收站单项：内容删净后再删 $I，否则回收站里会留下没有内容的条目
+            ds, errs = self._remove_path(path)
+            if not errs:
+                try: os.remove(info)
+                except FileNotFoundError: pass
+                except OSError: errs += 1
+            return ds, errs
+        return self._remove_path(path)
+
+    def _remove_path(self, path):
         if not os.path.exists(path): return 0, 0
         ds, errs = 0, 0
         try:
             if os.path.isfile(path): s=os.path.getsize(path); os.remove(path); return s, 0
-            for r, d, f in os.walk(path, topdown=False):
-                for file in f:
-                    try: fp=os.path.join(r,file); ds+=os.path.getsize(fp); os.remove(fp)
-                    except: errs+=1
-                for di in d:
-                    try: os.rmdir(os.path.join(r,di))
-                    except: pass
-            try: os.rmdir(path)
-            except: pass
+            dirs = []
+            for r, files, _ in walk_ordered(path, self._seek_ordered(path)):
+                dirs.append(r)
+                for e in files:
+                    try: sz = e.stat(follow_symlinks=False).st_size; os.remove(e.path); ds += sz
+                    except:
+                        try: os.rmdir(e.path)  # Windows 上指向目录的联接 / 符号链接
+                        except: errs += 1
+            for r in reversed(dirs):
+                try: os.rmdir(r)
+                except: pass
         except: errs+=1
         return ds, errs
 
@@ -516,48 +1364,42 @@ class SystemCleaner:
         except: return None
 
     def infer_info(self, name, dir_path):
-        name_lower = name.lower()
-        cat, soft = "其他应用", name
-        app_map = {
-            'google': ('浏览器缓存', 'Google Chrome'), 'chrome': ('浏览器缓存', 'Google Chrome'), 'edge': ('浏览器缓存', 'Edge'),
-            'microsoft': ('应用缓存', 'Microsoft Apps'), 'tencent': ('社交通讯', '腾讯软件'), 'wechat': ('社交通讯', '微信 WeChat'), 
-            'dingtalk': ('办公软件', '钉钉'), 'feishu': ('办公软件', '飞书'), 'adobe': ('设计工具', 'Adobe'), 'steam': ('游戏平台', 'Steam'),
-            'discord': ('通讯软件', 'Discord'), 'telegram': ('通讯软件', 'Telegram'), 'slack': ('通讯软件', 'Slack'),
-            'jetbrains': ('开发工具', 'JetBrains IDE'), 'vscode': ('开发工具', 'VS Code'), 'code': ('开发工具', 'VS Code'),
-            'netease': ('音乐软件', '网易云音乐'), 'qqmusic': ('音乐软件', 'QQ音乐'),
-        }
-        for key, (c, s) in app_map.items():
-            if key in name_lower: cat, soft = c, s; break
-        return cat, soft
+        # 结果只取决于顶层应用目录名，按目录名缓存
+        info = self._app_info_cache.get(name)
+        if info is None:
+            keys = [m.group(1) for m in self._app_re.finditer(name.lower())]
+            if keys: info = self.app_map[min(keys, key=self._app_rank.__getitem__)]
+            else: info = ("其他应用", name)
+            self._app_info_cache[name] = info
+        return info
 
     def scan_custom(self, paths):
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = len(paths) * 5
+        self._reset_walk_stats()
         
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            futures = [ex.submit(self._scan_single_custom, p) for p in paths]
-            for fut in as_completed(futures):
+        with self._executor(self.io_limits.pool_size(paths)) as ex:
+            futures = [ex.submit(self.io_limits.run, p, self._scan_single_custom, p) for p in paths]
+            for fut in self._iter_completed(futures):
                 self.scan_progress["current"] += 1
                 yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
                 for item in fut.result(): yield item
+        yield self._walk_stats_status()
 
     def _scan_single_custom(self, base):
         res = []
         if not os.path.exists(base): return res
         try:
-            for root, dirs, files in os.walk(base):
-                if root.count(os.sep) - base.count(os.sep) > 3: dirs[:] = []; continue
-                cur_name = os.path.basename(root).lower()
-                if any(k in cur_name for k in self.safe_keywords) and not any(k in cur_name for k in self.danger_keywords):
-                    s = self.get_dir_size_fast(root)
-                    if s > 0:
-                        res.append({"type": "item", "data": {
-                            "cat": "自定义目录", "soft": os.path.basename(base),
-                            "detail": os.path.relpath(root, base), "path": root,
-                            "raw_size": s, "display_size": format_size(s)
-                        }})
-                        dirs[:] = []
+            hits, stats = self.walk_and_size(base, self._is_junk_dir_name, max_depth=3)
+            self._merge_walk_stats(stats)
+            for root, _, s in hits:
+                if s > 0:
+                    res.append({"type": "item", "data": {
+                        "cat": "自定义目录", "soft": os.path.basename(base),
+                        "detail": os.path.relpath(root, base), "path": root,
+                        "raw_size": s, "display_size": format_size(s)
+                    }})
         except: pass
         return res
 
@@ -574,51 +1416,106 @@ class SystemCleaner:
                             yield {"type": "item", "data": {"name": entry.name, "path": entry.path, "raw_size": st.st_size, "date": datetime.fromtimestamp(st.st_mtime).strftime("%Y-%m-%d"), "display_size": format_size(st.st_size)}}
         except: pass
 
-    def scan_large_files(self):
-        dirs = [os.path.join(self.user_profile, d) for d in ["Downloads", "Desktop", "Documents", "Videos", "Pictures"]]
-        for d in dirs:
-            if not os.path.exists(d): continue
-            for r, ds, fs in os.walk(d):
-                if os.path.basename(r).startswith('.'): ds[:] = []; continue
-                for f in fs:
-                    fp = os.path.join(r, f)
+    def scan_large_files(self, roots=None, threshold=None, top_k=None):
+        """大文件雷达：各根目录按一级子目录分片并行遍历，复用 DirEntry.stat()，
+        用容量为 top_k 的小顶堆保留最大的文件；堆变化时节流产出 topk 消息（当前前 K 名，降序）"""
+        roots = [r for r in (roots or self.large_file_roots or [os.path.join(self.user_profile, d) for d in ["Downloads", "Desktop", "Documents", "Videos", "Pictures"]]) if os.path.isdir(r)]
+        threshold = self.large_file_threshold if threshold is None else threshold
+        top_k = top_k or self.large_file_top_k
+        self.scan_progress["start_time"] = time.time()
+        self.scan_progress["current"] = 0
+        self._reset_walk_stats()
+
+        # 分片：根目录自身的文件单独一片，其下每个一级子目录一片
+        shards = []
+        for r in roots:
+            shards.append((r, False))
+            try: shards += [(e.path, True) for e in os.scandir(r) if e.is_dir(follow_symlinks=False) and not e.name.startswith('.')]
+            except: pass
+        self.scan_progress["total"] = len(shards)
+        heap, lock, state = [], threading.Lock(), {"version": 0, "seen": set()}
+
+        def offer(size, path, name):
+            with lock:
+                if path in state["seen"]: return
+                if len(heap) < top_k: heapq.heappush(heap, (size, path, name))
+                elif size > heap[0][0]: state["seen"].discard(heapq.heappushpop(heap, (size, path, name))[1])
+                else: return
+                state["seen"].add(path)
+                state["version"] += 1
+
+        def walk(shard):
+            top, recurse = shard
+            stats = {"entries": 0, "dirs": 0, "bytes": 0}
+            for r, fs, ds in walk_ordered(top, self._seek_ordered(top)):
+                if self._cancelled(): break
+                stats["entries"] += len(fs) + len(ds); stats["dirs"] += len(ds)
+                if not recurse: ds[:] = []
+                else: ds[:] = [e for e in ds if not e.name.startswith('.')]
+                # 堆满后门槛随之抬高，大部分文件只需一次比较
+                floor = max(threshold, heap[0][0] if len(heap) >= top_k else 0)
+                for e in fs:
                     try:
-                        sz = os.path.getsize(fp)
-                        if sz > 100 * 1024 * 1024: 
-                            yield {"type": "item", "data": {"name": f, "path": fp, "raw_size": sz, "display_size": format_size(sz)}}
+                        sz = e.stat(follow_symlinks=False).st_size
+                        if sz > floor: offer(sz, e.path, e.name); stats["bytes"] += sz
                     except: pass
+            return stats
+
+        def snapshot(final=False):
+            with lock: rows = sorted(heap, reverse=True)
+            return {"type": "topk", "final": final, "items": [{"name": n, "path": p, "raw_size": sz, "display_size": format_size(sz)} for sz, p, n in rows]}
+
+        shown, last_emit = 0, 0.0
+        with self._executor(self.io_limits.pool_size([sh[0] for sh in shards])) as ex:
+            done_q = SimpleQueue()
+            futures = [ex.submit(self.io_limits.run, sh[0], walk, sh) for sh in shards]
+            for f in futures: f.add_done_callback(done_q.put)
+            # 不等分片完成：最多 0.3s 醒来一次，堆有变化就推送，单个巨大分片也能看到中途结果
+            left = len(futures)
+            while left:
+                if self._cancelled():
+                    for f in futures: f.cancel()
+                    break
+                try: fut = done_q.get(timeout=0.3)
+                except Empty: fut = None
+                if fut is not None:
+                    left -= 1
+                    try: self._merge_walk_stats(fut.result())
+                    except: pass
+                    self.scan_progress["current"] += 1
+                    yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
+                if left and state["version"] != shown and time.time() - last_emit >= 0.3:
+                    shown, last_emit = state["version"], time.time()
+                    yield snapshot()
+        yield snapshot(final=True)
+        yield self._walk_stats_status()
 
     def get_disk_usage(self):
         """获取各分区磁盘使用情况"""
         import shutil
         disks = []
-        bitmask = ctypes.windll.kernel32.GetLogicalDrives()
-        for i in range(26):
-            if bitmask & (1 << i):
-                drive = chr(ord('A') + i) + ":/"
-                if ctypes.windll.kernel32.GetDriveTypeW(drive) == 3:
-                    try:
-                        total, used, free = shutil.disk_usage(drive)
-                        disks.append({
-                            "drive": drive,
-                            "total": total,
-                            "used": used,
-                            "free": free,
-                            "percent": round(used / total * 100, 1)
-                        })
-                    except: pass
+        for drive in _fixed_drives():
+            try:
+                total, used, free = shutil.disk_usage(drive)
+                disks.append({
+                    "drive": drive,
+                    "total": total,
+                    "used": used,
+                    "free": free,
+                    "percent": round(used / total * 100, 1)
+                })
+            except: pass
         return disks
 
     # ==================== 新增功能 v6.5 ====================
     
     def scan_duplicate_files(self, scan_paths=None):
-        """扫描重复文件"""
-        import hashlib
+        """扫描重复文件：大小分桶 -> 并行头部哈希预筛 -> 并行全量 BLAKE2b -> 逐字节锁步确认"""
         if not scan_paths:
             scan_paths = [os.path.join(self.user_profile, d) for d in ["Downloads", "Desktop", "Documents", "Pictures"]]
         
-        # 按大小分组
-        size_map = {}
+        # 阶段 1：按大小分组（紧凑候选存储，超过内存上限时溢写到临时文件）
+        store = CandidateStore(self.dup_store_limit)
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = len(scan_paths) * 10
@@ -629,70 +1526,302 @@ class SystemCleaner:
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             yield {"type": "status", "msg": f"扫描目录: {base}"}
             
-            for root, dirs, files in os.walk(base):
+            for root, files, dirs in walk_ordered(base, self._seek_ordered(base)):
+                if self._cancelled(): store.close(); return
                 # 跳过隐藏目录
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
-                for f in files:
-                    fp = os.path.join(root, f)
+                dirs[:] = [d for d in dirs if not d.name.startswith('.')]
+                dir_id = None
+                for e in files:
                     try:
-                        sz = os.path.getsize(fp)
+                        if not e.is_file(follow_symlinks=False): continue
+                        sz = e.stat(follow_symlinks=False).st_size
                         if sz > 1024:  # 忽略小于1KB的文件
-                            if sz not in size_map: size_map[sz] = []
-                            size_map[sz].append(fp)
+                            if dir_id is None: dir_id = store.add_dir(root)
+                            store.add(dir_id, e.name, sz)
                     except: pass
         
-        # 对相同大小的文件计算哈希
-        hash_map = {}
-        potential_dups = {sz: paths for sz, paths in size_map.items() if len(paths) > 1}
-        
-        for sz, paths in potential_dups.items():
-            for fp in paths:
+        stats, candidates = {}, 0
+        if self.hash_cache is not None: self.hash_cache.hits = self.hash_cache.misses = 0
+        try:
+            # 同尺寸组从候选存储逐组流出，凑满 DUP_BATCH 个文件就走完一遍分阶段哈希，内存中只有当前一批的路径
+            for batch in self._dup_batches(store.groups()):
+                if self._cancelled(): return
+                candidates += sum(len(m) for _, m in batch)
+                for h, files in (yield from self._dup_pipeline(batch, stats)):
+                    for i, (sz, fp) in enumerate(files):
+                        yield {"type": "item", "data": {
+                            "cat": "重复文件",
+                            "soft": f"组 {h[:8]}",
+                            "detail": f"{'[保留]' if i == 0 else '[重复]'} {os.path.basename(fp)}",
+                            "path": fp,
+                            "raw_size": sz,
+                            "display_size": format_size(sz),
+                            "is_duplicate": i > 0,
+                            "hash": h
+                        }}
+        finally: store.close()
+        yield {"type": "status", "msg": f"候选存储: {store.files} 个文件, {len(store.dirs)} 个目录, 同尺寸候选 {candidates} 个, "
+                                        f"存储峰值约 {format_size(store.peak_bytes)}" + (f" (溢写 {store.spills} 次)" if store.spills else "") + f", 进程峰值内存 {format_size(peak_memory())}"}
+        msg = "重复文件: " + "，".join(f"{label} {n} 个文件 {format_size(b)} / {t:.1f}s ({b / max(t, 1e-9) / 1048576:.0f} MB/s)" for label, (n, b, t) in stats.items())
+        if self.hash_cache is not None:
+            msg += f"，哈希缓存命中 {self.hash_cache.hits}/{self.hash_cache.hits + self.hash_cache.misses}"
+            self.flush_hash_cache()
+        yield {"type": "status", "msg": msg}
+
+    def _dup_batches(self, size_groups):
+        """把 (大小, [路径]) 流按累计文件数切成批，每批为 [((大小,), [(大小, 路径), ...]), ...]"""
+        batch, n = [], 0
+        for sz, paths in size_groups:
+            batch.append(((sz,), [(sz, p) for p in paths]))
+            n += len(paths)
+            if n >= self.DUP_BATCH:
+                yield batch
+                batch, n = [], 0
+        if batch: yield batch
+
+    def _dup_pipeline(self, groups, stats):
+        """一批候选组依次经过头部哈希、全量哈希（仅大于 HEAD_BYTES 的文件）与逐字节确认，返回确认的重复组"""
+        # 不超过 HEAD_BYTES 的文件头部即全部内容，无需全量哈希
+        groups = yield from self._dup_hash_stage("头部", groups, self._get_head_hash, stats, limit=self.HEAD_BYTES)
+        small = [g for g in groups if g[0][0] <= self.HEAD_BYTES]
+        groups = small + (yield from self._dup_hash_stage("全量", [g for g in groups if g[0][0] > self.HEAD_BYTES], self._get_file_hash, stats))
+        # 与组内首个文件不一致（例如扫描期间被修改）的成员被剔除
+        return (yield from self._dup_confirm_stage(groups, stats))
+
+    def _dup_hash_stage(self, label, groups, digest, stats, limit=None):
+        """对各候选组成员并行计算 digest(path)，按 (原键, 摘要) 细分并丢弃单例；产出进度，返回细分后的分组。
+        limit 为每个文件最多读取的字节数（仅用于吞吐统计）"""
+        jobs = [(key, sz, p) for key, members in groups for sz, p in members]
+        refined, t = {}, time.perf_counter()
+        read = sum(min(sz, limit or sz) for _, sz, _ in jobs)
+        self.scan_progress["current"] = 0
+        with self._executor(self.io_limits.pool_size([p for _, _, p in jobs] or [self.user_profile])) as ex:
+            futures = {ex.submit(self.io_limits.run, p, digest, p): (key, sz, p) for key, sz, p in jobs}
+            for fut in self._iter_completed(futures):
+                key, sz, p = futures[fut]
+                h = fut.result()
+                if h is not None: refined.setdefault(key + (h,), []).append((sz, p))
+                self.scan_progress["current"] += 1
+                if self.scan_progress["current"] % 64 == 0 or self.scan_progress["current"] == len(jobs):
+                    yield {"type": "progress", "current": self.scan_progress["current"], "total": len(jobs), "start_time": self.scan_progress["start_time"]}
+        self._add_stage_stats(stats, f"{label}哈希", len(jobs), read, time.perf_counter() - t)
+        return [(key, sorted(members, key=lambda m: m[1])) for key, members in refined.items() if len(members) > 1]
+
+    def _dup_confirm_stage(self, groups, stats):
+        """并行逐字节确认各候选组，产出进度，返回 [(组哈希, [(大小, 路径), ...])]。
+        每次扫描都重新逐字节确认：(大小, mtime, inode) 不变并不能保证内容未变，不能作为删除依据"""
+        confirmed, read, t = [], [0], time.perf_counter()
+        with self._executor(self.io_limits.pool_size([m[0][1] for _, m in groups] or [self.user_profile])) as ex:
+            futures = {ex.submit(self.io_limits.run, m[0][1], self._same_as_first, [p for _, p in m], read): (key, m) for key, m in groups}
+            self.scan_progress["current"] = 0
+            for fut in self._iter_completed(futures):
+                key, members = futures[fut]
+                same = set(fut.result())
+                if len(same) > 1: confirmed.append((key[-1], [m for m in members if m[1] in same]))
+                self.scan_progress["current"] += 1
+                yield {"type": "progress", "current": self.scan_progress["current"], "total": len(groups), "start_time": self.scan_progress["start_time"]}
+        self._add_stage_stats(stats, "逐字节确认", sum(len(m) for _, m in groups), read[0], time.perf_counter() - t)
+        confirmed.sort(key=lambda g: g[1][0][1])
+        return confirmed
+
+    def _add_stage_stats(self, stats, label, files, read, seconds):
+        n, b, t = stats.get(label, (0, 0, 0.0))
+        stats[label] = (n + files, b + read, t + seconds)
+
+    def hardlink_group(self, paths):
+        """就地去重：把重复组中其余文件替换为指向第一个文件（保留项）的硬链接，所有路径都保留。
+        只处理与保留项同一卷、尚未互为硬链接的文件；替换前逐字节确认内容一致，并确认确认后副本与保留项都未被修改。
+        每个副本先链接到同目录的临时名再 os.replace 覆盖原文件，替换是原子的；按目录批量处理。
+        副本本身还有其他硬链接时，数据仍被引用，只有其链接数降到 0 才计入回收字节数。
+        返回 (回收字节数, 已链接路径列表, 跳过/失败数)"""
+        keep, freed, linked, skipped = paths[0], 0, [], 0
+        try: ks = os.stat(keep)
+        except OSError: return 0, [], len(paths) - 1
+        sigs = {}
+        for p in paths[1:]:
+            try: st = os.stat(p)
+            except OSError: skipped += 1; continue
+            if st.st_dev != ks.st_dev or st.st_size != ks.st_size: skipped += 1
+            elif st.st_ino != ks.st_ino: sigs[p] = st
+        same = set(self._same_as_first([keep] + list(sigs)))
+        skipped += len(sigs) - len(same & set(sigs))
+        by_dir = {}
+        for p in sigs:
+            if p in same: by_dir.setdefault(os.path.dirname(p), []).append(p)
+        links_left = {}  # inode -> 尚未被替换的链接数
+        for p in same & set(sigs): links_left.setdefault(sigs[p].st_ino, sigs[p].st_nlink)
+        sig = lambda st: (st.st_size, st.st_mtime_ns, st.st_ino)
+        for d, files in by_dir.items():
+            for p in files:
+                st, tmp = sigs[p], os.path.join(d, f".{os.path.basename(p)}.{os.getpid()}.cclink")
                 try:
-                    h = self._get_file_hash(fp)
-                    if h:
-                        if h not in hash_map: hash_map[h] = []
-                        hash_map[h].append({"path": fp, "size": sz})
-                except: pass
-        
-        # 输出重复文件组
-        for h, files in hash_map.items():
-            if len(files) > 1:
-                total_waste = files[0]["size"] * (len(files) - 1)
-                for i, f in enumerate(files):
-                    yield {"type": "item", "data": {
-                        "cat": "重复文件",
-                        "soft": f"组 {h[:8]}",
-                        "detail": f"{'[保留]' if i == 0 else '[重复]'} {os.path.basename(f['path'])}",
-                        "path": f["path"],
-                        "raw_size": f["size"],
-                        "display_size": format_size(f["size"]),
-                        "is_duplicate": i > 0,
-                        "hash": h
-                    }}
+                    # 确认之后保留项或副本被修改过，确认结果即失效
+                    if sig(os.stat(keep)) != sig(ks) or sig(os.stat(p)) != sig(st): skipped += 1; continue
+                    os.link(keep, tmp)
+                    os.replace(tmp, p)
+                    linked.append(p)
+                    links_left[st.st_ino] -= 1
+                    if links_left[st.st_ino] == 0: freed += st.st_size
+                except OSError:
+                    skipped += 1
+                    try: os.remove(tmp)
+                    except OSError: pass
+            self._drop_size_trees(d)
+        return freed, linked, skipped
+
+    def _same_as_first(self, paths, read=None, batch=31):
+        """锁步比较：其余文件与第一个文件同步按块读取，出现差异的文件立即退出；全部退出即提前结束。
+        返回与第一个文件内容一致的路径（含第一个）"""
+        same = [paths[0]]
+        for i in range(1, len(paths), batch):
+            opened = []
+            try:
+                ref = open(paths[0], 'rb', buffering=0)
+                opened.append(ref)
+                alive = []
+                for p in paths[i:i + batch]:
+                    try: fh = open(p, 'rb', buffering=0); opened.append(fh); alive.append((p, fh))
+                    except OSError: pass
+                while alive:
+                    chunk = ref.read(self.HASH_CHUNK)
+                    if read is not None: read[0] += len(chunk) * (1 + len(alive))
+                    alive = [(p, fh) for p, fh in alive if fh.read(self.HASH_CHUNK) == chunk]
+                    if not chunk: break
+                same += [p for p, _ in alive]
+            except OSError: pass
+            finally:
+                for fh in opened: fh.close()
+        return same
 
-    def _get_file_hash(self, filepath, block_size=65536):
-        """计算文件MD5哈希（只读取前后各64KB加速）"""
-        import hashlib
-        hasher = hashlib.md5()
+    def _cached_digest(self, kind, filepath, compute):
+        """先查持久哈希缓存，未命中再计算；计算前后文件签名一致才写回缓存"""
+        if self.hash_cache is None: return compute(filepath)
+        try: st = os.stat(filepath)
+        except OSError: return None
+        h = self.hash_cache.get(kind, filepath, st)
+        if h is None:
+            h = compute(filepath)
+            try: after = os.stat(filepath)
+            except OSError: return h
+            if h is not None and (after.st_size, after.st_mtime_ns, after.st_ino) == (st.st_size, st.st_mtime_ns, st.st_ino):
+                self.hash_cache.put(kind, filepath, st, h)
+        return h
+
+    def flush_hash_cache(self):
+        if self.hash_cache is not None: self.hash_cache.save()
+
+    def _hash_buffer(self):
+        """线程内复用的读缓冲区"""
+        buf = getattr(self._hash_local, "buf", None)
+        if buf is None: buf = self._hash_local.buf = bytearray(self.HASH_CHUNK)
+        return buf
+
+    def _get_head_hash(self, filepath):
+        """头部预筛哈希：只读取前 HEAD_BYTES 字节（经持久缓存）"""
+        return self._cached_digest("head", filepath, self._hash_head)
+
+    def _hash_head(self, filepath):
         try:
-            with open(filepath, 'rb') as f:
-                sz = os.path.getsize(filepath)
-                if sz <= block_size * 2:
-                    buf = f.read()
-                    hasher.update(buf)
-                else:
-                    # 读取头部
-                    hasher.update(f.read(block_size))
-                    # 读取尾部
-                    f.seek(-block_size, 2)
-                    hasher.update(f.read(block_size))
-                    # 加入文件大小
-                    hasher.update(str(sz).encode())
+            with open(filepath, 'rb', buffering=0) as f:
+                return hashlib.blake2b(f.read(self.HEAD_BYTES), digest_size=16).hexdigest()
+        except: return None
+
+    def _get_file_hash(self, filepath):
+        """文件全量内容哈希（BLAKE2b-128），优先取持久缓存"""
+        return self._cached_digest("blake2b", filepath, self._hash_content)
+
+    def _hash_content(self, filepath):
+        """按 HASH_CHUNK 读入线程内复用的缓冲区计算全量 BLAKE2b-128"""
+        hasher = hashlib.blake2b(digest_size=16)
+        buf = self._hash_buffer()
+        view = memoryview(buf)
+        try:
+            with open(filepath, 'rb', buffering=0) as f:
+                while True:
+                    n = f.readinto(buf)
+                    if not n: break
+                    hasher.update(view[:n])
             return hasher.hexdigest()
         except: return None
 
+    def scan_similar_images(self, scan_paths=None, max_distance=None):
+        """相似图片：聊天图片缓存与图片文件夹中被转发、重新压缩的同一张图。
+        分批并行计算 dHash（经持久哈希缓存），多索引分桶 + 向量化汉明距离聚类，按重复文件的格式输出"""
+        if utils.Image is None:
+            yield {"type": "status", "msg": "相似图片识别需要 Pillow（pip install pillow），已跳过"}
+            return
+        if not scan_paths:
+            scan_paths = self._social_image_dirs() + [os.path.join(self.user_profile, "Pictures")]
+        max_distance = self.similar_max_distance if max_distance is None else max_distance
+        self.scan_progress["start_time"] = time.time()
+        self.scan_progress["current"] = 0
+        self.scan_progress["total"] = 1
+
+        files = []
+        for base in scan_paths:
+            if not os.path.isdir(base): continue
+            yield {"type": "status", "msg": f"扫描目录: {base}"}
+            for root, fs, ds in walk_ordered(base, self._seek_ordered(base)):
+                if self._cancelled(): return
+                ds[:] = [d for d in ds if not d.name.startswith('.')]
+                for e in fs:
+                    if os.path.splitext(e.name)[1].lower() in utils.IMAGE_EXTS:
+                        try:
+                            sz = e.stat(follow_symlinks=False).st_size
+                            if sz > 1024: files.append((e.path, sz))
+                        except: pass
+
+        # 分批计算感知哈希：每批一个任务，减少调度开销
+        batch, hashed, t = 256, [], time.perf_counter()
+        batches = [files[i:i + batch] for i in range(0, len(files), batch)]
+        self.scan_progress["total"] = max(len(batches), 1)
+        with self._executor(self.io_limits.pool_size([b[0][0] for b in batches] or [self.user_profile])) as ex:
+            futures = [ex.submit(self.io_limits.run, b[0][0], self._dhash_batch, b) for b in batches]
+            for fut in self._iter_completed(futures):
+                hashed += fut.result()
+                self.scan_progress["current"] += 1
+                yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
+        if self._cancelled(): return
+        t_hash, t = time.perf_counter() - t, time.perf_counter()
+        # 每组保留体积最大（通常画质最好）的一张，其余成员都在它的阈值距离之内
+        order = sorted(range(len(hashed)), key=lambda i: (-hashed[i][1], hashed[i][0]))
+        rank = [0] * len(hashed)
+        for r, i in enumerate(order): rank[i] = r
+        clusters = utils.cluster_hashes([h for _, _, h in hashed], max_distance, rank=rank)
+        t_cluster = time.perf_counter() - t
+
+        for members in sorted(([hashed[i] for i in c] for c in clusters), key=lambda m: min(p for p, _, _ in m)):
+            h = f"{members[0][2]:016x}"
+            for i, (fp, sz, _) in enumerate(members):
+                yield {"type": "item", "data": {
+                    "cat": "相似图片",
+                    "soft": f"组 {h[:8]}",
+                    "detail": f"{'[保留]' if i == 0 else '[相似]'} {os.path.basename(fp)}",
+                    "path": fp,
+                    "raw_size": sz,
+                    "display_size": format_size(sz),
+                    "is_duplicate": i > 0,
+                    "hash": h
+                }}
+        self.flush_hash_cache()
+        yield {"type": "status", "msg": f"相似图片: {len(files)} 张, 感知哈希 {len(hashed)} 张 / {t_hash:.1f}s ({len(hashed) / max(t_hash, 1e-9):.0f} 张/秒), "
+                                        f"聚类 {t_cluster:.2f}s{'' if utils.np is not None else '（未安装 NumPy，使用纯 Python 比较）'}, {len(clusters)} 组"}
+
+    def _dhash_batch(self, batch):
+        """一批图片的 dHash -> [(路径, 大小, 64 位哈希)]，跳过无法解码的文件"""
+        res = []
+        for fp, sz in batch:
+            if self._cancelled(): break
+            h = self._cached_digest("dhash", fp, self._dhash_hex)
+            if h is not None: res.append((fp, sz, int(h, 16)))
+        return res
+
+    def _dhash_hex(self, path):
+        h = utils.dhash_image(path)
+        return None if h is None else f"{h:016x}"
+
     def scan_empty_folders(self):
-        """扫描空文件夹"""
+        """扫描空文件夹：一次后序判定，只含空目录的目录也算空，每棵最大空子树只报告一次"""
         scan_roots = [
             self.user_profile,
             os.path.join(self.local_appdata),
@@ -708,27 +1837,56 @@ class SystemCleaner:
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             
-            for root, dirs, files in os.walk(base, topdown=False):
-                # 跳过系统目录
-                if any(ex in root.lower() for ex in self.SYSTEM_EXCLUDE): continue
-                
-                try:
-                    # 检查是否为空目录
-                    if not os.listdir(root):
-                        yield {"type": "item", "data": {
-                            "cat": "空文件夹",
-                            "soft": os.path.basename(os.path.dirname(root)),
-                            "detail": os.path.basename(root),
-                            "path": root,
-                            "raw_size": 0,
-                            "display_size": "0 B"
-                        }}
-                except: pass
+            for root, count in self.find_empty_trees(base):
+                if self._cancelled(): return
+                yield {"type": "item", "data": {
+                    "cat": "空文件夹",
+                    "soft": os.path.basename(os.path.dirname(root)),
+                    "detail": os.path.basename(root) + (f" (含 {count} 个空子目录)" if count else ""),
+                    "path": root,
+                    "raw_size": 0,
+                    "display_size": "0 B",
+                    "empty_dirs": count
+                }}
+
+    def find_empty_trees(self, base):
+        """后序判定递归空目录：目录内没有任何非目录项、且每个子目录都为空时即为空。
+        只使用遍历时已列出的目录项；返回每棵最大空子树 [(根路径, 子孙目录数)]，base 本身不报告"""
+        base = os.path.normpath(base)
+        order, index = [], {}
+        for root, files, subdirs in walk_ordered(base, self._seek_ordered(base)):
+            if self._cancelled(): return []
+            # 系统目录视为非空内容且不深入
+            kept = [e for e in subdirs if not any(ex in e.path.lower() for ex in self.SYSTEM_EXCLUDE)]
+            no_files = not files and len(kept) == len(subdirs)
+            subdirs[:] = kept
+            index[root] = len(order)
+            order.append([root, index.get(os.path.dirname(root)) if root != base else None, no_files, len(kept), 0, 0])
+        # 记录: [路径, 父索引, 无非目录项, 子目录数, 已判空的子目录数, 子孙目录数]；
+        # 前序倒序处理时子目录总是先于父目录，读不到的子目录不会计入，父目录因此保持非空
+        for rec in reversed(order):
+            path, parent, no_files, n_sub, n_empty, desc = rec
+            rec[2] = no_files and n_empty == n_sub
+            if rec[2] and parent is not None:
+                order[parent][4] += 1
+                order[parent][5] += desc + 1
+        def maximal(rec):
+            parent = rec[1] is not None and order[rec[1]]
+            return rec[2] and parent and (not parent[2] or parent[1] is None)
+        return [(rec[0], rec[5]) for rec in order if maximal(rec)]
+
+    def remove_empty_tree(self, path):
+        """一次移除整棵空子树：自底向上 rmdir，不删除任何文件（期间出现的新文件会让对应目录保留）"""
+        self._drop_size_trees(path)
+        dirs = [r for r, _, _ in walk_ordered(path)]
+        errs = 0
+        for r in reversed(dirs):
+            try: os.rmdir(r)
+            except: errs += 1
+        return 0, errs
 
     def scan_broken_shortcuts(self):
-        """扫描无效快捷方式"""
-        import struct
-        
+        """扫描无效快捷方式：按 MS-SHLLINK 格式解析目标，目标是否存在按父目录批量判断"""
         paths = [
             os.path.join(self.user_profile, "Desktop"),
             os.path.join(self.roaming_appdata, "Microsoft", "Windows", "Start Menu", "Programs"),
@@ -740,41 +1898,44 @@ class SystemCleaner:
         self.scan_progress["current"] = 0
         self.scan_progress["total"] = len(paths)
         
+        links = []
         for base in paths:
             if not os.path.exists(base): continue
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             
-            for root, dirs, files in os.walk(base):
-                for f in files:
-                    if f.lower().endswith('.lnk'):
-                        fp = os.path.join(root, f)
-                        target = self._get_lnk_target(fp)
-                        if target and not os.path.exists(target):
-                            yield {"type": "item", "data": {
-                                "cat": "无效快捷方式",
-                                "soft": "桌面" if "Desktop" in base else "开始菜单",
-                                "detail": f"{f} → {target}",
-                                "path": fp,
-                                "raw_size": os.path.getsize(fp),
-                                "display_size": format_size(os.path.getsize(fp))
-                            }}
+            for root, files, dirs in walk_ordered(base, self._seek_ordered(base)):
+                if self._cancelled(): return
+                for e in files:
+                    if e.name.lower().endswith('.lnk'):
+                        try: links.append((base, e.path, e.stat(follow_symlinks=False).st_size))
+                        except OSError: pass
+
+        # 先解析全部快捷方式，再按目标的父目录排序批量判断，同一目录只列举一次
+        resolved = [(base, fp, sz, self._get_lnk_target(fp)) for base, fp, sz in links]
+        checker = utils.PathExistenceCache()
+        for base, fp, sz, target in sorted((r for r in resolved if r[3]), key=lambda r: os.path.normcase(os.path.dirname(r[3]))):
+            if self._cancelled(): return
+            if not checker.exists(target):
+                yield {"type": "item", "data": {
+                    "cat": "无效快捷方式",
+                    "soft": "桌面" if "Desktop" in base else "开始菜单",
+                    "detail": f"{os.path.basename(fp)} → {target}",
+                    "path": fp,
+                    "raw_size": sz,
+                    "display_size": format_size(sz)
+                }}
+        yield {"type": "status", "msg": f"快捷方式 {len(links)} 个，有文件系统目标 {sum(1 for r in resolved if r[3])} 个，列举目录 {checker.listed} 次"}
 
     def _get_lnk_target(self, lnk_path):
-        """解析.lnk文件获取目标路径"""
-        try:
-            with open(lnk_path, 'rb') as f:
-                content = f.read()
-                # 简化解析：查找常见路径模式
-                for pattern in [b'C:\\', b'D:\\', b'E:\\', b'F:\\']:
-                    idx = content.find(pattern)
-                    if idx != -1:
-                        end = content.find(b'\x00', idx)
-                        if end != -1:
-                            path = content[idx:end].decode('utf-8', errors='ignore')
-                            if path and len(path) > 3:
-                                return path
-        except: pass
+        """解析.lnk文件获取目标路径：LinkInfo 的本地/UNC 路径，其次环境变量块，再次相对路径；
+        没有文件系统目标（如“此电脑”等 Shell 命名空间链接）时返回 None"""
+        info = utils.read_lnk(lnk_path)
+        if not info: return None
+        if info["target"]:
+            return os.path.expandvars(info["target"]) if info["kind"] == "env" else info["target"]
+        if info["kind"] == "relative":
+            return os.path.normpath(os.path.join(os.path.dirname(lnk_path), info["relative_path"]))
         return None
 
     def scan_game_cache(self):
@@ -827,12 +1988,14 @@ class SystemCleaner:
         self.scan_progress["total"] = len(game_targets)
         
         for target in game_targets:
+            if self._cancelled(): return
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             
+            roots = self._tree_roots(target["paths"])
             for path in target["paths"]:
                 if os.path.exists(path):
-                    s = self.get_dir_size_fast(path)
+                    s = self.tree_size(path, root=roots.get(os.path.normpath(path)))
                     if s > 0:
                         yield {"type": "item", "data": {
                             "cat": target["cat"],
@@ -879,58 +2042,82 @@ class SystemCleaner:
         self.scan_progress["total"] = len(backup_targets)
         
         for target in backup_targets:
+            if self._cancelled(): return
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
             
             for path in target["paths"]:
                 if os.path.exists(path):
-                    s = self.get_dir_size_fast(path)
-                    if s > 1024 * 1024:  # 大于1MB才显示
-                        yield {"type": "item", "data": {
-                            "cat": target["cat"],
-                            "soft": target["name"],
-                            "detail": os.path.basename(path),
-                            "path": path,
-                            "raw_size": s,
-                            "display_size": format_size(s)
-                        }}
+                    # 手机备份动辄数十 GB：先显示抽样估计，大于1MB才显示
+                    item = self._sized_item({"cat": target["cat"], "soft": target["name"], "detail": os.path.basename(path)}, path, min_size=1024 * 1024)
+                    if item: yield item
+        yield from self._drain_exact_updates()
 
     def scan_browser_extensions_cache(self):
-        """扫描浏览器扩展缓存"""
+        """扫描浏览器扩展缓存：Chromium 系由 Local State 列出配置文件，每个配置文件一次列举，按扩展 ID 汇总
+        Service Worker 缓存并解析扩展名称（扩展设置 / IndexedDB 只汇总展示，不列入清理）；Firefox 仍按缓存目录名匹配"""
         browsers = {
             "Chrome": os.path.join(self.local_appdata, "Google", "Chrome", "User Data"),
             "Edge": os.path.join(self.local_appdata, "Microsoft", "Edge", "User Data"),
-            "Firefox": os.path.join(self.roaming_appdata, "Mozilla", "Firefox", "Profiles"),
         }
+        firefox = os.path.join(self.roaming_appdata, "Mozilla", "Firefox", "Profiles")
         
         self.scan_progress["start_time"] = time.time()
         self.scan_progress["current"] = 0
-        self.scan_progress["total"] = len(browsers) * 3
+        self.scan_progress["total"] = len(browsers) + 1
+        self._reset_walk_stats()
         
-        for browser, base_path in browsers.items():
-            if not os.path.exists(base_path): continue
+        for browser, user_data in browsers.items():
+            if self._cancelled(): return
+            if not os.path.exists(user_data): continue
             self.scan_progress["current"] += 1
             yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
-            
-            # 扫描扩展缓存目录
-            cache_patterns = ["Service Worker", "IndexedDB", "Cache", "Code Cache", "GPUCache", "ShaderCache"]
-            
-            for root, dirs, files in os.walk(base_path):
-                if root.count(os.sep) - base_path.count(os.sep) > 4: dirs[:] = []; continue
-                
-                folder_name = os.path.basename(root)
-                if folder_name in cache_patterns or "cache" in folder_name.lower():
-                    s = self.get_dir_size_fast(root)
-                    if s > 1024 * 1024:  # 大于1MB
-                        yield {"type": "item", "data": {
-                            "cat": "浏览器扩展缓存",
-                            "soft": browser,
-                            "detail": folder_name,
-                            "path": root,
-                            "raw_size": s,
-                            "display_size": format_size(s)
-                        }}
-                        dirs[:] = []
+            profiles = utils.chromium_profiles(user_data)
+            for dir_name, display in profiles:
+                if self._cancelled(): return
+                soft = browser if len(profiles) == 1 else f"{browser} · {display}"
+                kept, kept_size = set(), 0
+                for item in self.extension_storage(os.path.join(user_data, dir_name)):
+                    if item.get("keep"):
+                        kept.add(item["ext_id"]); kept_size += item["raw_size"]
+                    elif item["raw_size"] > 1024 * 1024:  # 大于1MB
+                        item["soft"] = soft
+                        yield {"type": "item", "data": item}
+                if kept: yield {"type": "status", "msg": f"{soft}: {len(kept)} 个扩展的设置 / IndexedDB 数据共 {format_size(kept_size)}（扩展状态，未列入清理）"}
+
+        if os.path.exists(firefox) and not self._cancelled():
+            self.scan_progress["current"] += 1
+            yield {"type": "progress", "current": self.scan_progress["current"], "total": self.scan_progress["total"], "start_time": self.scan_progress["start_time"]}
+            match = lambda name: name in ("cache2", "startupCache", "shader-cache") or "cache" in name.lower()
+            hits, stats = self.walk_and_size(firefox, match, max_depth=3)
+            self._merge_walk_stats(stats)
+            for root, _, s in hits:
+                if s > 1024 * 1024:
+                    yield {"type": "item", "data": {"cat": "浏览器扩展缓存", "soft": "Firefox", "detail": os.path.basename(root), "path": root, "raw_size": s, "display_size": format_size(s)}}
+        yield self._walk_stats_status()
+
+    def extension_storage(self, profile):
+        """单个 Chromium 配置文件的扩展存储条目：每个扩展、每类存储一项，名称取自 manifest / _locales；
+        另附配置文件自身的 Cache / Code Cache / GPUCache / ScriptCache，只清缓存而不动整个配置文件。
+        Local Extension Settings 与 IndexedDB 是扩展的状态数据（密码管理器、钱包的保险库都在这里），
+        标记 keep 仅供展示，只有 Service Worker 的 CacheStorage 与各缓存目录可清理"""
+        names = utils.extension_names(profile)
+        stats = {"entries": 0, "dirs": 0, "bytes": 0}
+        items = []
+        for ext_id, parts in utils.extension_storage_dirs(profile).items():
+            name = names.get(ext_id) or f"已卸载扩展 {ext_id[:8]}"
+            for kind, path in parts:
+                s = self.get_dir_size_fast(path, stats)
+                item = {"cat": "浏览器扩展缓存", "detail": f"{name} · {kind}", "path": path, "raw_size": s, "display_size": format_size(s), "ext_id": ext_id}
+                if kind in ("Local Extension Settings", "IndexedDB"): item.update(cat="浏览器扩展数据", keep=True)
+                items.append(item)
+        for sub in ("Cache", "Code Cache", "GPUCache", os.path.join("Service Worker", "ScriptCache")):
+            path = os.path.join(profile, sub)
+            if not os.path.isdir(path): continue
+            s = self.get_dir_size_fast(path, stats)
+            items.append({"cat": "浏览器缓存", "detail": sub, "path": path, "raw_size": s, "display_size": format_size(s)})
+        self._merge_walk_stats(stats)
+        return items
 
     def clear_clipboard_history(self):
         """清理剪贴板历史"""
@@ -1,7 +1,7 @@
 import os
 import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 from queue import Queue, Empty
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
@@ -25,8 +25,14 @@ class CleanerGUI:
         self.history = CleanHistory()
         self.config_mgr = ConfigManager()
         self.backup_mgr = BackupManager()
+        self.cleaner.scan_backend = self.config_mgr.config.get("scan_backend", "thread")
+        self.apply_large_file_config()
         
         self.node_map = {} 
+        self.path_nodes = {}
+        self.scan_thread = None
+        self.scan_token = 0
+        self.scan_cancel = None
         self.total_scan_size = 0
         self.size_stats = {}
         
@@ -34,9 +40,16 @@ class CleanerGUI:
         self.setup_style()
         self.setup_layout()
         
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         if not utils.is_admin():
             self.root.after(100, self.ask_admin)
 
+    def on_close(self):
+        if self.scan_cancel: self.scan_cancel.set()
+        self.cleaner.shutdown_exact_pool()
+        self.cleaner.shutdown_process_pool()
+        self.root.destroy()
+
     def ask_admin(self):
         if messagebox.askyesno("权限提示", "部分清理功能需要管理员权限，是否以管理员身份重新启动？"):
             utils.run_as_admin()
@@ -100,7 +113,9 @@ class CleanerGUI:
             self.menu.insert("", "end", text=f"  {self.icons['box']}  安装包清理"): "inst",
             self.menu.insert("", "end", text=f"  {self.icons['search']}  大文件雷达"): "large",
             self.menu.insert("", "end", text=f"  🔄  重复文件"): "duplicate",
+            self.menu.insert("", "end", text=f"  {self.icons['image']}  相似图片"): "similar",
             self.menu.insert("", "end", text=f"  📂  空文件夹"): "empty",
+            self.menu.insert("", "end", text=f"  🗑️  回收站明细"): "recycle",
             self.menu.insert("", "end", text=f"  🔗  无效快捷方式"): "shortcut",
             self.menu.insert("", "end", text=f"  🎮  游戏缓存"): "game",
             self.menu.insert("", "end", text=f"  📱  手机备份"): "phone",
@@ -163,7 +178,7 @@ class CleanerGUI:
         self.set_cols("junk")
 
     def set_cols(self, mode):
-        if mode in ["junk", "social", "custom", "resign", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
+        if mode in ["junk", "social", "custom", "resign", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
             self.tree.configure(show="tree headings")
             self.tree["columns"] = ("size", "path")
             self.tree.heading("#0", text="  分类 / 名称", anchor="w"); self.tree.column("#0", width=400)
@@ -253,9 +268,11 @@ class CleanerGUI:
     def on_menu_change(self, e):
         sel = self.menu.selection()
         if not sel: return
+        self.abandon_scan()
         self.current_mode = self.menu_items[sel[0]]
         self.tree.delete(*self.tree.get_children())
         self.node_map = {}
+        self.path_nodes = {}
         self.size_stats = {}
         self.lbl_title.config(text="准备就绪")
         self.progress_frame.pack_forget()
@@ -269,7 +286,7 @@ class CleanerGUI:
             count = len(self.custom_paths)
             self.lbl_title.config(text=f"已添加 {count} 个敏感目录" if self.current_mode == "resign" else f"已添加 {count} 个目录")
         
-        if self.current_mode in ["junk", "social", "custom", "resign", "inst", "large", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
+        if self.current_mode in ["junk", "social", "custom", "resign", "inst", "large", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
             self.btn_backup.pack(side="left", padx=(0, 8))
 
         if self.current_mode == "disk":
@@ -341,6 +358,27 @@ class CleanerGUI:
         stats = self.history.get_stats()
         self.tree.insert("", "end", iid="history_stats", values=("累计清理统计", f"释放 {utils.format_size(stats['total_freed'])} / {stats['total_items']} 项", ""))
         
+        # 目录大小索引
+        index_count = len(self.cleaner.size_index.entries) if self.cleaner.size_index is not None else 0
+        self.tree.insert("", "end", iid="size_index", values=("目录大小索引", f"已缓存 {index_count} 个目录", "重建"))
+        
+        # 目录名索引
+        name_files = utils.NameIndex.index_files()
+        self.tree.insert("", "end", iid="name_index", values=("目录名索引", f"{len(name_files)} 个磁盘 · {utils.format_size(sum(sz for _, sz in name_files))}", "重建"))
+        
+        # 文件哈希缓存
+        hash_count = self.cleaner.hash_cache.count() if self.cleaner.hash_cache is not None else 0
+        self.tree.insert("", "end", iid="hash_cache", values=("文件哈希缓存", f"已缓存 {hash_count} 条摘要", "清空"))
+        
+        # 分片扫描后端
+        backend = self.config_mgr.config.get("scan_backend", "thread")
+        self.tree.insert("", "end", iid="scan_backend", values=("扫描后端", "多进程" if backend == "process" else "多线程", "切换"))
+        
+        # 大文件雷达
+        large = self.config_mgr.config.get("large_files", {})
+        scope = "整个用户目录" if large.get("roots") else "常用目录"
+        self.tree.insert("", "end", iid="large_files", values=("大文件雷达", f"≥ {large.get('threshold_mb', 100)} MB · 前 {large.get('top_k', 1000)} 个 · {scope}", "设置"))
+        
         # 一键锁屏
         self.tree.insert("", "end", iid="lock_screen", values=("🔒 一键锁屏", "清理后锁定电脑", "立即锁屏"))
         
@@ -386,6 +424,27 @@ class CleanerGUI:
                     messagebox.showerror("失败", "导入配置失败")
         elif item == "custom_paths":
             self.show_custom_paths_manager()
+        elif item == "size_index":
+            if messagebox.askyesno("确认", "清空目录大小索引？下次扫描将全量重新统计。"):
+                self.cleaner.refresh_size_index()
+                self.show_settings()
+        elif item == "name_index":
+            if messagebox.askyesno("确认", "清空目录名索引？下次离职专清将重新建立各磁盘的索引。"):
+                self.cleaner.clear_name_indexes()
+                self.show_settings()
+        elif item == "hash_cache":
+            if messagebox.askyesno("确认", "清空文件哈希缓存？下次查找重复文件将重新读取全部候选文件。"):
+                if self.cleaner.hash_cache is not None: self.cleaner.hash_cache.clear()
+                self.show_settings()
+        elif item == "scan_backend":
+            backend = "thread" if self.config_mgr.config.get("scan_backend", "thread") == "process" else "process"
+            self.config_mgr.config["scan_backend"] = backend
+            self.config_mgr.save()
+            self.cleaner.scan_backend = backend
+            if backend == "thread": self.cleaner.shutdown_process_pool()
+            self.show_settings()
+        elif item == "large_files":
+            self.configure_large_files()
         elif item == "lock_screen":
             if messagebox.askyesno("确认", "确定要立即锁定屏幕吗？"):
                 self.cleaner.lock_screen()
@@ -507,6 +566,10 @@ class CleanerGUI:
             messagebox.showinfo("提示", "设置已自动保存")
             return
         
+        if self.btn_action['text'] == "停止扫描":
+            self.cleaner.cancel_scan(self.scan_cancel)
+            self.btn_action.config(state="disabled", text="正在停止...")
+            return
         if self.btn_action['text'] == "立即清理":
             self.clean_selected()
             return
@@ -515,10 +578,11 @@ class CleanerGUI:
             return
         self.tree.delete(*self.tree.get_children())
         self.node_map = {}
+        self.path_nodes = {}
         self.size_stats = {}
         self.total_scan_size = 0
         self.lbl_title.config(text="正在分析中...")
-        self.btn_action.config(state="disabled", bg="#cccccc")
+        self.btn_action.config(state="normal", text="停止扫描", bg=self.colors["orange"])
         
         # 显示进度条
         self.progress["value"] = 0
@@ -526,29 +590,51 @@ class CleanerGUI:
         self.lbl_progress.config(text="准备中...")
         self.progress_frame.pack(fill="x", before=self.tree_frame, padx=25, pady=(0, 15))
         
-        threading.Thread(target=self.thread_scan, daemon=True).start()
-        self.root.after(20, self.consume_queue)
+        # 上一次被放弃的扫描最多再等 2 秒收尾；它持有自己的取消令牌，新扫描发放新令牌，不会把它重新放行
+        if self.scan_thread and self.scan_thread.is_alive():
+            self.cleaner.cancel_scan(self.scan_cancel)
+            self.scan_thread.join(2)
+        self.scan_cancel = self.cleaner.new_scan()
+        self.scan_token += 1
+        self.queue = Queue()
+        self.scan_thread = threading.Thread(target=self.thread_scan, args=(self.queue, self.current_mode, self.scan_cancel), daemon=True)
+        self.scan_thread.start()
+        self.root.after(20, self.consume_queue, self.scan_token)
+
+    def abandon_scan(self):
+        """切换模式时放弃正在进行的扫描：通知后台停止，并让旧的队列消费循环失效"""
+        if self.scan_thread and self.scan_thread.is_alive():
+            self.cleaner.cancel_scan(self.scan_cancel)
+        self.scan_token += 1
 
-    def thread_scan(self):
+    def thread_scan(self, queue, mode, cancel):
+        self.cleaner.bind_scan(cancel)
         gen = None
-        if self.current_mode == "junk": gen = self.cleaner.scan_generator()
-        elif self.current_mode == "social": gen = self.cleaner.scan_social_apps()
-        elif self.current_mode == "resign": gen = self.cleaner.scan_resignation_targets(self.custom_paths)
-        elif self.current_mode == "custom": gen = self.cleaner.scan_custom(self.custom_paths)
-        elif self.current_mode == "inst": gen = self.cleaner.scan_installers()
-        elif self.current_mode == "large": gen = self.cleaner.scan_large_files()
-        elif self.current_mode == "duplicate": gen = self.cleaner.scan_duplicate_files()
-        elif self.current_mode == "empty": gen = self.cleaner.scan_empty_folders()
-        elif self.current_mode == "shortcut": gen = self.cleaner.scan_broken_shortcuts()
-        elif self.current_mode == "game": gen = self.cleaner.scan_game_cache()
-        elif self.current_mode == "phone": gen = self.cleaner.scan_phone_backups()
-        elif self.current_mode == "browser_ext": gen = self.cleaner.scan_browser_extensions_cache()
-        elif self.current_mode == "clipboard": gen = self.cleaner.scan_clipboard_data()
+        if mode == "junk": gen = self.cleaner.scan_generator()
+        elif mode == "social": gen = self.cleaner.scan_social_apps()
+        elif mode == "resign": gen = self.cleaner.scan_resignation_targets(self.custom_paths)
+        elif mode == "custom": gen = self.cleaner.scan_custom(self.custom_paths)
+        elif mode == "inst": gen = self.cleaner.scan_installers()
+        elif mode == "large": gen = self.cleaner.scan_large_files()
+        elif mode == "duplicate": gen = self.cleaner.scan_duplicate_files()
+        elif mode == "similar": gen = self.cleaner.scan_similar_images()
+        elif mode == "empty": gen = self.cleaner.scan_empty_folders()
+        elif mode == "recycle": gen = self.cleaner.scan_recycle_bin()
+        elif mode == "shortcut": gen = self.cleaner.scan_broken_shortcuts()
+        elif mode == "game": gen = self.cleaner.scan_game_cache()
+        elif mode == "phone": gen = self.cleaner.scan_phone_backups()
+        elif mode == "browser_ext": gen = self.cleaner.scan_browser_extensions_cache()
+        elif mode == "clipboard": gen = self.cleaner.scan_clipboard_data()
         if gen:
-            for item in gen: self.queue.put(item)
-        self.queue.put({"type": "done"})
+            for item in gen:
+                if cancel.is_set(): break
+                queue.put(item)
+        self.cleaner.flush_size_index()
+        self.cleaner.flush_hash_cache()
+        queue.put({"type": "done", "cancelled": cancel.is_set()})
 
-    def consume_queue(self):
+    def consume_queue(self, token):
+        if token != self.scan_token: return
         try:
             start_time = time.time()
             while time.time() - start_time < 0.05:
@@ -575,7 +661,7 @@ class CleanerGUI:
                         
                 elif m_type == "item":
                     data = msg['data']
-                    if self.current_mode in ["junk", "social", "custom", "resign", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
+                    if self.current_mode in ["junk", "social", "custom", "resign", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
                         self.add_junk_node(data)
                     elif self.current_mode == "inst":
                         tag = self.get_size_tag(data['raw_size'])
@@ -583,9 +669,13 @@ class CleanerGUI:
                     elif self.current_mode == "large":
                         tag = self.get_size_tag(data['raw_size'])
                         self.tree.insert("", "end", values=(data['name'], data['path'], data['display_size']), tags=(tag,))
+                elif m_type == "update":
+                    self.update_junk_node(msg['data'])
+                elif m_type == "topk" and self.current_mode == "large":
+                    self.show_large_topk(msg['items'])
                 elif m_type == "done":
                     self.progress_frame.pack_forget()
-                    if self.current_mode in ["junk", "social", "custom", "resign", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
+                    if self.current_mode in ["junk", "social", "custom", "resign", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]:
                         if self.total_scan_size == 0: self.lbl_title.config(text="系统很干净")
                         else:
                             self.update_junk_tree_stats()
@@ -593,11 +683,42 @@ class CleanerGUI:
                     else: 
                         self.lbl_title.config(text="扫描完成")
                         self.update_btn_state()
-                    self.btn_action.config(state="disabled", text="立即清理")
-                    self.status_bar.config(text="  Scan completed.")
+                    self.btn_action.config(state="disabled", text="立即清理", bg="#cccccc")
+                    self.status_bar.config(text="  Scan cancelled." if msg.get("cancelled") else "  Scan completed.")
+                    if msg.get("cancelled"): self.lbl_title.config(text=f"扫描已停止 · {self.lbl_title['text']}")
                     return
         except Empty: pass
-        self.root.after(20, self.consume_queue)
+        self.root.after(20, self.consume_queue, token)
+
+    def show_large_topk(self, items):
+        """用最新的前 K 名刷新大文件列表：只增删有变化的行，再按体积重新排序"""
+        keep = {d['path'] for d in items}
+        for iid in self.tree.get_children():
+            if iid not in keep: self.tree.delete(iid)
+        for idx, d in enumerate(items):
+            if not self.tree.exists(d['path']):
+                self.tree.insert("", "end", iid=d['path'], values=(d['name'], d['path'], d['display_size']), tags=(self.get_size_tag(d['raw_size']),))
+            self.tree.move(d['path'], "", idx)
+        self.lbl_title.config(text=f"前 {len(items)} 个大文件 · 共 {utils.format_size(sum(d['raw_size'] for d in items))}")
+
+    def apply_large_file_config(self):
+        cfg = self.config_mgr.config.get("large_files", {})
+        self.cleaner.large_file_roots = cfg.get("roots") or None
+        self.cleaner.large_file_threshold = cfg.get("threshold_mb", 100) * 1024 * 1024
+        self.cleaner.large_file_top_k = cfg.get("top_k", 1000)
+
+    def configure_large_files(self):
+        """设置大文件雷达的最小体积、保留数量与扫描范围"""
+        cfg = self.config_mgr.config.get("large_files", {})
+        mb = simpledialog.askinteger("大文件雷达", "最小文件体积 (MB):", initialvalue=cfg.get("threshold_mb", 100), minvalue=1, parent=self.root)
+        if mb is None: return
+        k = simpledialog.askinteger("大文件雷达", "保留最大的前 K 个文件:", initialvalue=cfg.get("top_k", 1000), minvalue=1, parent=self.root)
+        if k is None: return
+        whole = messagebox.askyesno("大文件雷达", "扫描整个用户目录？\n选择“否”仅扫描下载、桌面、文档、视频、图片。")
+        self.config_mgr.config["large_files"] = {"threshold_mb": mb, "top_k": k, "roots": [self.cleaner.user_profile] if whole else []}
+        self.config_mgr.save()
+        self.apply_large_file_config()
+        self.show_settings()
 
     def get_size_tag(self, size):
         if size > 500 * 1024 * 1024: return "huge"
@@ -627,10 +748,25 @@ class CleanerGUI:
         tag = self.get_size_tag(data['raw_size'])
         self.tree.insert(soft_id, "end", iid=uid, text=f"  {self.icons['bin']}  {data['detail']}", values=(data['display_size'], data['path']), tags=(tag,))
         self.node_map[uid] = data
+        self.path_nodes[data['path']] = uid
         self.total_scan_size += data['raw_size']
         self.size_stats[cat_id] += data['raw_size']
         self.size_stats[soft_id] += data['raw_size']
 
+    def update_junk_node(self, update):
+        """用精确统计结果覆盖此前显示的抽样估计值"""
+        uid = self.path_nodes.get(update['path'])
+        if not uid or not self.tree.exists(uid): return
+        data = self.node_map[uid]
+        delta = update['raw_size'] - data['raw_size']
+        data.update(update)
+        data.pop('estimated', None)
+        self.tree.set(uid, "size", data['display_size'])
+        self.tree.item(uid, tags=(self.get_size_tag(data['raw_size']),))
+        self.total_scan_size += delta
+        self.size_stats[f"cat_{data['cat']}"] += delta
+        self.size_stats[f"soft_{data['cat']}_{data['soft']}"] += delta
+
     def update_junk_tree_stats(self):
         cats = self.tree.get_children()
         cat_list = []
@@ -669,8 +805,9 @@ class CleanerGUI:
     def on_select(self, e): self.update_btn_state()
 
     def update_btn_state(self):
+        if self.btn_action['text'] in ("停止扫描", "正在停止..."): return
         sel = self.tree.selection()
-        tree_modes = ["junk", "social", "custom", "resign", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]
+        tree_modes = ["junk", "social", "custom", "resign", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]
         has_leaf = any(s in self.node_map for s in sel) if self.current_mode in tree_modes else bool(sel)
         if has_leaf: self.btn_action.config(state="normal", bg="#d83b01", fg="white")
         else: self.btn_action.config(state="disabled", bg="#cccccc")
@@ -697,7 +834,7 @@ class CleanerGUI:
 
         # 3. 开始清理/粉碎
         paths = []
-        tree_modes = ["junk", "social", "custom", "resign", "duplicate", "empty", "shortcut", "game", "phone", "browser_ext", "clipboard"]
+        tree_modes = ["junk", "social", "custom", "resign", "duplicate", "similar", "empty", "recycle", "shortcut", "game", "phone", "browser_ext", "clipboard"]
         if self.current_mode in tree_modes:
             for s in sel:
                 if s in self.node_map: paths.append(self.node_map[s]['path'])
@@ -719,12 +856,14 @@ class CleanerGUI:
     def thread_clean(self, paths):
         total_freed = 0
         total = len(paths)
-        max_workers = min(total, 12) if paths else 1
         completed = 0
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            clean_func = self.cleaner.shred_item if self.current_mode == "resign" else self.cleaner.delete_item
-            future_to_path = {executor.submit(clean_func, p): p for p in paths}
+        # 线程数按所涉设备的并发上限之和；每个删除任务占用所在设备的槽位，耗时参与自适应
+        limits = self.cleaner.io_limits
+        if self.current_mode == "resign": self.cleaner.reset_shred_stats()
+        with ThreadPoolExecutor(max_workers=limits.pool_size(paths)) as executor:
+            clean_func = {"resign": self.cleaner.shred_item, "empty": self.cleaner.remove_empty_tree}.get(self.current_mode, self.cleaner.delete_item)
+            future_to_path = {executor.submit(limits.run, p, clean_func, p, sample=True): p for p in paths}
             for future in as_completed(future_to_path):
                 try:
                     freed, _ = future.result()
@@ -756,6 +895,7 @@ class CleanerGUI:
                     info = f"清理结束！已释放空间: {utils.format_size(msg['size'])}"
                     if self.current_mode == "resign":
                         report_p = self.cleaner.generate_report(msg['size'], msg['count'])
+                        info += f"\n{self.cleaner.shred_summary()}"
                         if report_p: info += f"\n\n已为您在桌面生成安全审计报告。"
                     
                     messagebox.showinfo("完成", info)
@@ -787,8 +927,85 @@ class CleanerGUI:
                 menu.add_command(label="  🔍  预览文件列表 ", command=lambda: self.show_preview_window(self.node_map[item]['path'], self.node_map[item].get('detail', '')))
                 menu.add_separator()
                 menu.add_command(label="  💾  备份此项 ", command=lambda: self.backup_single(item))
+                if self.current_mode == "duplicate" and self.node_map[item].get('hash'):
+                    menu.add_command(label="  🔗  硬链接去重（保留所有路径） ", command=lambda: self.dedupe_group(item))
+                if self.node_map[item].get('age_units') is not None:
+                    menu.add_command(label="  📊  按月 / 类型分布 ", command=lambda: self.show_age_hist(item))
+                    menu.add_command(label="  ⏳  清理 N 天前的内容 ", command=lambda: self.clean_older(item))
             menu.post(event.x_root, event.y_root)
 
+    def dedupe_group(self, item):
+        """把所选文件所在重复组的多余副本替换为指向保留文件的硬链接"""
+        h = self.node_map[item]['hash']
+        members = sorted(((uid, d) for uid, d in self.node_map.items() if d.get('hash') == h and self.tree.exists(uid)), key=lambda m: m[1].get('is_duplicate', False))
+        paths = [d['path'] for _, d in members]
+        if len(paths) < 2: return
+        if not messagebox.askyesno("硬链接去重", f"将 {len(paths) - 1} 个重复副本替换为指向\n{paths[0]}\n的硬链接？\n\n所有路径都会保留，内容只占一份空间（需位于同一分区）。"): return
+        self.status_bar.config(text="  Action: 正在逐字节校验并建立硬链接...")
+        result = []
+        worker = threading.Thread(target=lambda: result.append(self.cleaner.hardlink_group(paths)), daemon=True)
+        worker.start()
+
+        def finish():
+            if worker.is_alive(): self.root.after(100, finish); return
+            freed, linked, skipped = result[0] if result else (0, [], len(paths) - 1)
+            linked = set(linked)
+            for uid, d in members:
+                if d['path'] in linked:
+                    d['is_duplicate'] = False
+                    self.tree.item(uid, text=f"  {self.icons['link']}  [已链接] {os.path.basename(d['path'])}")
+            self.status_bar.config(text=f"  Action: 硬链接去重完成，回收 {utils.format_size(freed)}")
+            info = f"已链接 {len(linked)} 个副本，回收空间: {utils.format_size(freed)}"
+            if skipped: info += f"\n跳过 {skipped} 个（跨分区、内容不一致或已被修改）"
+            messagebox.showinfo("硬链接去重", info)
+        finish()
+
+    def show_age_hist(self, item):
+        """按月列出该目录的占用，并附上按文件头识别的类型占用"""
+        data = self.node_map[item]
+        hist = data.get('age_hist') or {}
+        lines = [f"{m}    {utils.format_size(b)}" for m, b in sorted(hist.items(), reverse=True)]
+        text = f"{data['detail']}\n\n" + ("\n".join(lines[:36]) if lines else "暂无内容") + (f"\n... 另有 {len(lines) - 36} 个月" if len(lines) > 36 else "")
+        types = data.get('type_totals')
+        if types: text += "\n\n按类型:\n" + "\n".join(f"{k}    {utils.format_size(v)}" for k, v in sorted(types.items(), key=lambda kv: -kv[1]))
+        messagebox.showinfo("按月 / 类型分布", text)
+
+    def clean_older(self, item):
+        """只删除早于 N 天的文件 / 月份目录，使用扫描时记录的清理单元，无需重新扫描"""
+        data = self.node_map[item]
+        days = simpledialog.askinteger("按时间清理", "清理多少天以前的内容？", parent=self.root, initialvalue=90, minvalue=0)
+        if days is None: return
+        cutoff = time.time() - days * 86400
+        old = [u for u in data['age_units'] if u[1] < cutoff]
+        if not old: messagebox.showinfo("按时间清理", f"没有早于 {days} 天的内容"); return
+        size = sum(u[2] for u in old)
+        if not messagebox.askyesno("按时间清理", f"将删除 {data['detail']} 中早于 {days} 天的 {len(old)} 项，共 {utils.format_size(size)}？"): return
+        self.status_bar.config(text="  Action: 正在按时间清理...")
+        result = []
+        worker = threading.Thread(target=lambda: result.append(self.cleaner.clean_older_than(data['age_units'], days)), daemon=True)
+        worker.start()
+
+        def finish():
+            if worker.is_alive(): self.root.after(100, finish); return
+            freed, errs, kept = result[0] if result else (0, 1, data['age_units'])
+            hist = {}
+            for u in kept: hist[u[3]] = hist.get(u[3], 0) + u[2]
+            remaining = sum(hist.values())
+            delta = remaining - data['raw_size']
+            data.update({"age_units": kept, "age_hist": hist, "raw_size": remaining, "display_size": utils.format_size(remaining)})
+            data.pop("type_totals", None)  # 类型占用随清理失效，下次扫描重新识别
+            if self.tree.exists(item):
+                self.tree.set(item, "size", data['display_size'])
+                self.tree.item(item, tags=(self.get_size_tag(remaining),))
+            self.total_scan_size += delta
+            self.size_stats[f"cat_{data['cat']}"] += delta
+            self.size_stats[f"soft_{data['cat']}_{data['soft']}"] += delta
+            self.update_junk_tree_stats()
+            if freed > 0: self.history.add_record(self.current_mode, freed, len(old) - errs)
+            self.status_bar.config(text=f"  Action: 按时间清理完成，回收 {utils.format_size(freed)}")
+            messagebox.showinfo("按时间清理", f"回收空间: {utils.format_size(freed)}" + (f"\n{errs} 项删除失败（可能被占用）" if errs else ""))
+        finish()
+
     def backup_single(self, item):
         """备份单个项目"""
         if item not in self.node_map: return
@@ -1,6 +1,7 @@
 import tkinter as tk
 import ctypes
 import os
+import multiprocessing
 from gui import CleanerGUI
 
 def main():
@@ -24,4 +25,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # 打包成 exe 后多进程扫描后端的子进程从这里进入，须先交给 multiprocessing 处理
+    multiprocessing.freeze_support()
     main()
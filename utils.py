@@ -2,8 +2,25 @@ import os
 import ctypes
 import sys
 import json
+import re
+import stat
+import hashlib
+import mmap
+import time
+import struct
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import deque, Counter
 from datetime import datetime
 
+# 可选依赖：相似图片识别需要 Pillow 解码图片；有 NumPy 时哈希与汉明距离计算向量化
+try: import numpy as np
+except ImportError: np = None
+try: from PIL import Image
+except ImportError: Image = None
+
 # --- 现代彩色 3D 符号库 (高清 3D 渲染) ---
 ICONS = {
     'clean': "🧹",
@@ -37,6 +54,7 @@ ICONS = {
     'link': "🔗",
     'empty': "📂",
     'duplicate': "🔄",
+    'image': "🖼️",
     'clipboard': "📋",
     'browser': "🌐"
 }
@@ -68,6 +86,347 @@ def format_time(seconds):
     else:
         return f"{int(seconds // 3600)}时{int((seconds % 3600) // 60)}分"
 
+def _locality_key(entry):
+    """磁盘位置的近似：POSIX 取 inode 号（dirent 自带，无需 stat）；Windows 取创建时间（FindNextFile 已带回，
+    同一目录下先创建的文件通常在 MFT 与数据区中也靠前）"""
+    try: return entry.stat(follow_symlinks=False).st_ctime_ns if os.name == "nt" else entry.inode()
+    except OSError: return 0
+
+def list_dir(path, ordered=False):
+    """一次性列出目录项；ordered=True 时按磁盘位置近似排序，随后的 stat / 读取 / 删除按顺序推进，减少机械盘寻道"""
+    with os.scandir(path) as it: entries = list(it)
+    if ordered: entries.sort(key=_locality_key)
+    return entries
+
+def walk_ordered(path, ordered=False):
+    """前序遍历，产出 (目录, 非目录项列表, 子目录项列表)；与 os.walk 一样可原地修改子目录列表来剪枝。
+    ordered=True 时目录内各项与子目录的访问顺序均按磁盘位置排序"""
+    stack = [path]
+    while stack:
+        top = stack.pop()
+        try: entries = list_dir(top, ordered)
+        except OSError: continue
+        files, subdirs = [], []
+        for e in entries:
+            try: (subdirs if e.is_dir(follow_symlinks=False) else files).append(e)
+            except OSError: files.append(e)
+        yield top, files, subdirs
+        stack.extend(e.path for e in reversed(subdirs))
+
+def scan_dir_entries(path, stats=None, ordered=False):
+    """列出单个目录，返回 (直属文件总大小, 直属文件数, 子目录路径列表, 大文件 {名称: 大小})"""
+    size, count, subdirs, big = 0, 0, [], {}
+    try:
+        for entry in list_dir(path, ordered):
+            if stats is not None: stats["entries"] += 1
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    sz = entry.stat(follow_symlinks=False).st_size
+                    count += 1
+                    if sz >= DirSizeIndex.BIG_FILE: big[entry.name] = sz
+                    else: size += sz
+                elif entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    if stats is not None: stats["dirs"] += 1
+            except: pass
+    except: pass
+    return size, count, subdirs, big
+
+# --- 并行目录统计（工作窃取） ---
+class WorkStealingSizer:
+    """共享的目录统计线程池。每个任务是若干棵子树，工作线程用本地栈在线程内顺序遍历，不为每个目录排队、加锁；
+    只有在有线程空闲、且自己队列里已没有可供窃取的任务时，才把本地栈底（靠近任务根、通常最大的子树）的一半分出去。
+    因此开始时的分叉发生在根附近的大子树上，之后各线程都忙时小目录一律就地处理。
+    自己从队列尾部取，空闲时从其他线程队列头部窃取。visit(path, stats) 需返回 (直属文件大小, 直属文件数, 子目录路径列表)。"""
+
+    def __init__(self, visit, workers=4, cancelled=None):
+        self.visit = visit
+        self.cancelled = cancelled or (lambda: False)
+        self.workers = max(1, int(workers))
+        self.queues = [deque() for _ in range(self.workers)]
+        self.cond = threading.Condition()
+        self.idle = 0
+        self.stopped = False
+        self.threads = []
+        self.active = {}  # id(job) -> job，关闭时据此唤醒仍在等待的调用方
+        self.tasks = 0  # 累计执行的任务数（分出的子树批次），用于观察拆分开销
+        self._rr = 0
+
+    def _start(self):
+        with self.cond:
+            if self.threads: return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, args=(i,), daemon=True)
+                t.start()
+                self.threads.append(t)
+
+    def shutdown(self):
+        """停止工作线程并丢弃排队的目录；仍在等待的 dir_size 调用被唤醒并抛出 RuntimeError"""
+        with self.cond:
+            self.stopped = True
+            for q in self.queues: q.clear()
+            for job in self.active.values():
+                job["failed"] = True
+                job["done"].set()
+            self.active = {}
+            self.cond.notify_all()
+
+    def dir_size(self, path, stats=None, cancelled=None):
+        """阻塞直到 path 整棵子树统计完成，返回总字节数；stats 累计 entries/dirs；cancelled 为发起方所属扫描的取消检查。
+        线程池已关闭（或等待期间被关闭）时抛出 RuntimeError"""
+        if not self.threads: self._start()
+        job = {"total": 0, "pending": 1, "stats": stats, "lock": threading.Lock(), "done": threading.Event(), "cancelled": cancelled or self.cancelled, "failed": False}
+        with self.cond:
+            if self.stopped: raise RuntimeError("目录统计线程池已关闭")
+            self.active[id(job)] = job
+            self._rr = (self._rr + 1) % self.workers
+            self.queues[self._rr].append((job, [path]))
+            self.cond.notify()
+        job["done"].wait()
+        with self.cond: self.active.pop(id(job), None)
+        if job["failed"]: raise RuntimeError("目录统计线程池已关闭")
+        return job["total"]
+
+    def _take(self, idx):
+        try: return self.queues[idx].pop()
+        except IndexError: pass
+        for k in range(1, self.workers):
+            try: return self.queues[(idx + k) % self.workers].popleft()
+            except IndexError: pass
+        return None
+
+    def _run(self, idx):
+        own = self.queues[idx]
+        while not self.stopped:
+            task = self._take(idx)
+            if task is None:
+                with self.cond:
+                    self.idle += 1
+                    self.cond.wait(0.05)
+                    self.idle -= 1
+                continue
+            job, roots = task
+            self.tasks += 1
+            local = {"entries": 0, "dirs": 0}
+            total, stack = 0, list(roots)
+            cancelled = job["cancelled"]
+            # 已取消的任务不再展开子目录，只做计数收尾，等待方很快返回
+            while stack and not self.stopped and not cancelled():
+                path = stack.pop()
+                try: size, _, subdirs = self.visit(path, local)
+                except: size, subdirs = 0, []
+                total += size
+                stack.extend(subdirs)
+                if self.idle and not own and len(stack) > 1:
+                    # 分出的一半作为一个任务整体被窃取，窃取方再按同样规则继续对半分，任务数随线程数对数增长
+                    give = stack[:len(stack) // 2]
+                    del stack[:len(give)]
+                    # 先登记待完成数再入队，避免被窃取的任务先于登记完成而提前判定整个统计结束
+                    with job["lock"]: job["pending"] += 1
+                    own.append((job, give))
+                    with self.cond: self.cond.notify()
+            with job["lock"]:
+                job["total"] += total
+                job["pending"] -= 1
+                if job["stats"] is not None:
+                    job["stats"]["entries"] += local["entries"]
+                    job["stats"]["dirs"] += local["dirs"]
+                finished = job["pending"] == 0
+            if finished: job["done"].set()
+
+# --- 内存大小树 ---
+class SizeTree:
+    """以 root 为根一次遍历构建的后序聚合大小树，树内任意目录的大小都是 O(1) 查询。
+    visit(path, stats) 需返回 (直属文件大小, 直属文件数, 子目录路径列表)。"""
+
+    def __init__(self, root, visit, stats=None, cancelled=None):
+        root = os.path.normpath(root)
+        self.root = os.path.normcase(root)
+        self.built_at = time.time()
+        self.sizes = {}
+        order = []
+        stack = [(root, None)]
+        while stack:
+            if cancelled is not None and cancelled(): break
+            path, parent = stack.pop()
+            size, _, subdirs = visit(path, stats)
+            key = os.path.normcase(path)
+            order.append((key, parent, size))
+            stack.extend((d, key) for d in subdirs)
+        # 前序序列倒过来处理时，子目录总是先于父目录完成，即后序聚合
+        for key, parent, size in reversed(order):
+            total = self.sizes.get(key, 0) + size
+            self.sizes[key] = total
+            if parent is not None: self.sizes[parent] = self.sizes.get(parent, 0) + total
+
+    def contains(self, path):
+        key = os.path.normcase(os.path.normpath(path))
+        return key == self.root or key.startswith(self.root.rstrip(os.sep) + os.sep)
+
+    def size_of(self, path):
+        """目录在树内返回其总大小，否则返回 None"""
+        return self.sizes.get(os.path.normcase(os.path.normpath(path)))
+
+# --- 按设备自适应并发 ---
+def _mount_table():
+    """POSIX: [(挂载点, 设备, 文件系统类型)]，按挂载点长度降序，便于最长前缀匹配"""
+    rows = []
+    try:
+        with open("/proc/self/mounts", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3: rows.append((parts[1].replace("\\040", " "), parts[0], parts[2]))
+    except: pass
+    rows.sort(key=lambda r: len(r[0]), reverse=True)
+    return rows
+
+
+class DeviceLimiter:
+    """单个设备的可调并发上限。acquire/release 占用槽位；observe(秒, 条目数) 汇报一次目录读取的耗时，
+    每满一个窗口计算平均每条目延迟与设备吞吐（条目 / 窗口墙钟秒）：延迟接近基线且槽位用满则加一个槽位；延迟明显升高且吞吐
+    也跌落时记为慢窗口，连续 SLOW_WINDOWS 个慢窗口才收缩。只有延迟升高而吞吐不变属于排队（线程调度、GIL 争用），
+    减少并发并不能让设备更快，因此不收缩。"""
+    WINDOW = 64
+    SLOW_WINDOWS = 3
+
+    def __init__(self, kind, limit, max_limit, min_limit=1):
+        self.kind = kind
+        self.limit, self.max_limit, self.min_limit = limit, max_limit, min_limit
+        self.active = 0
+        self._cond = threading.Condition()
+        # 不同粒度的延迟（目录读取按条目 / 整个删除任务）各自维护窗口与基线：
+        # 通道 -> [样本数, 累计秒, 累计条目, 窗口起点, 延迟基线, 吞吐峰值, 连续慢窗口数]
+        self._windows = {}
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= self.limit: self._cond.wait()
+            self.active += 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def observe(self, seconds, channel="read", count=1):
+        now = time.perf_counter()
+        with self._cond:
+            win = self._windows.get(channel)
+            if win is None: win = self._windows[channel] = [0, 0.0, 0, now - seconds, None, 0.0, 0]
+            win[0] += 1
+            win[1] += seconds
+            win[2] += max(1, count)
+            if win[0] < self.WINDOW: return
+            mean = win[1] / win[2]
+            rate = win[2] / max(now - win[3], 1e-9)
+            # 基线取历史窗口的最小值并缓慢上浮、吞吐峰值缓慢回落，避免一次偶然的快窗口永久压低上限
+            base = mean if win[4] is None else min(win[4] * 1.05, mean)
+            peak = max(win[5] * 0.95, rate)
+            slow = win[6] + 1 if mean > base * 2.0 and rate < peak * 0.7 else 0
+            win[:] = [0, 0.0, 0, now, base, peak, slow]
+            if slow >= self.SLOW_WINDOWS:
+                self.limit = max(self.min_limit, self.limit * 3 // 4)
+                win[6] = 0
+            elif not slow and mean <= base * 1.3 and self.active >= self.limit:
+                self.limit = min(self.max_limit, self.limit + 1)
+            self._cond.notify_all()
+
+
+class IOConcurrency:
+    """把任务按所在物理设备分组限流：SSD 并发高，机械盘只放少量遍历线程，网络共享居中，
+    各设备上限再按实测目录读取延迟自适应调整。"""
+    # 类型: (初始上限, 最大上限)
+    PROFILES = {"ssd": (16, 32), "hdd": (2, 4), "net": (6, 16)}
+    NET_FS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "sshfs", "fuse.sshfs", "9p", "afs"}
+
+    def __init__(self):
+        self.limiters = {}
+        self._lock = threading.Lock()
+        self._mounts = _mount_table() if os.name != "nt" else []
+
+    def device_key(self, path):
+        """Windows 取盘符或 UNC 共享根，POSIX 取最长匹配挂载点；纯字符串运算，不触碰磁盘"""
+        if os.name == "nt":
+            drive = os.path.splitdrive(os.path.abspath(path))[0]
+            return drive.upper() or path
+        path = os.path.abspath(path)
+        for mnt, _, _ in self._mounts:
+            if path == mnt or path.startswith(mnt.rstrip("/") + "/"): return mnt
+        return "/"
+
+    def detect_kind(self, key):
+        """返回 'ssd' / 'hdd' / 'net'；无法判断时按 SSD 处理（与旧的固定并发行为一致）"""
+        try:
+            if os.name == "nt": return self._detect_kind_windows(key)
+            return self._detect_kind_posix(key)
+        except: return "ssd"
+
+    def _detect_kind_posix(self, key):
+        dev, fstype = next(((d, t) for m, d, t in self._mounts if m == key), ("", ""))
+        if fstype in self.NET_FS or dev.startswith("//"): return "net"
+        if not dev.startswith("/dev/"): return "ssd"
+        # /sys/class/block/<分区> 指向的目录本身没有 queue 时，上一级即整块磁盘
+        node = os.path.realpath(os.path.join("/sys/class/block", os.path.basename(os.path.realpath(dev))))
+        for cand in (node, os.path.dirname(node)):
+            flag = os.path.join(cand, "queue", "rotational")
+            if os.path.exists(flag):
+                with open(flag) as f: return "hdd" if f.read().strip() == "1" else "ssd"
+        return "ssd"
+
+    def _detect_kind_windows(self, key):
+        if key.startswith("\\\\") or ctypes.windll.kernel32.GetDriveTypeW(key + "\\") == 4: return "net"  # DRIVE_REMOTE
+        from ctypes import wintypes
+
+        class StoragePropertyQuery(ctypes.Structure):
+            _fields_ = [("PropertyId", wintypes.DWORD), ("QueryType", wintypes.DWORD), ("AdditionalParameters", ctypes.c_ubyte * 1)]
+
+        class SeekPenaltyDescriptor(ctypes.Structure):
+            _fields_ = [("Version", wintypes.DWORD), ("Size", wintypes.DWORD), ("IncursSeekPenalty", ctypes.c_ubyte)]
+
+        k32 = ctypes.windll.kernel32
+        k32.CreateFileW.restype = wintypes.HANDLE
+        h = k32.CreateFileW(f"\\\\.\\{key}", 0, 3, None, 3, 0, None)  # 仅查询属性，无需读权限
+        if not h or h == wintypes.HANDLE(-1).value: return "ssd"
+        try:
+            query = StoragePropertyQuery(7, 0)  # StorageDeviceSeekPenaltyProperty, PropertyStandardQuery
+            out, ret = SeekPenaltyDescriptor(), wintypes.DWORD()
+            ok = k32.DeviceIoControl(wintypes.HANDLE(h), 0x2D1400, ctypes.byref(query), ctypes.sizeof(query),
+                                     ctypes.byref(out), ctypes.sizeof(out), ctypes.byref(ret), None)  # IOCTL_STORAGE_QUERY_PROPERTY
+            return "hdd" if ok and out.IncursSeekPenalty else "ssd"
+        finally: k32.CloseHandle(wintypes.HANDLE(h))
+
+    def limiter(self, path):
+        key = self.device_key(path)
+        lim = self.limiters.get(key)
+        if lim is None:
+            kind = self.detect_kind(key)
+            with self._lock:
+                lim = self.limiters.setdefault(key, DeviceLimiter(kind, *self.PROFILES[kind]))
+        return lim
+
+    def run(self, path, fn, *args, sample=False):
+        """在 path 所在设备的槽位内执行 fn(*args)；sample=True 时把整次调用耗时计入延迟反馈"""
+        lim = self.limiter(path)
+        lim.acquire()
+        t = time.perf_counter()
+        try: return fn(*args)
+        finally:
+            if sample: lim.observe(time.perf_counter() - t, "task")
+            lim.release()
+
+    def observe(self, path, seconds, count=1):
+        self.limiter(path).observe(seconds, count=count)
+
+    def pool_size(self, paths, cap=64):
+        """线程池大小：涉及各设备最大上限之和（实际并发由设备槽位约束）"""
+        keys = {}
+        for p in paths: keys.setdefault(self.device_key(p), p)
+        return max(1, min(cap, len(paths), sum(self.limiter(p).max_limit for p in keys.values())))
+
+    def summary(self):
+        return ", ".join(f"{k} {lim.kind.upper()}×{lim.limit}" for k, lim in sorted(self.limiters.items()))
+
+
 # --- 清理历史记录管理 ---
 class CleanHistory:
     def __init__(self):
@@ -210,3 +569,982 @@ class BackupManager:
                     "time": datetime.fromtimestamp(os.path.getmtime(fp)).strftime("%Y-%m-%d %H:%M")
                 })
         return sorted(backups, key=lambda x: x["time"], reverse=True)
+
+# --- 目录大小持久索引 ---
+class DirSizeIndex:
+    """按目录记录 [mtime_ns, 直属小文件大小, 直属文件数, 子目录名, 大文件{名称: 大小}, 最近使用日, 列举时间]。
+    目录 mtime 未变化时复用记录而不再 scandir。文件原地增长不会改变目录 mtime：大文件（如 Docker 的 vhdx）命中时仍单独
+    stat 一次；BIG_FILE 以下的小文件（日志、数据库等）不逐个 stat，记录列举超过 REVALIDATE 秒后重新列举一次，
+    在此之前其增长不会反映到统计结果中。"""
+    BIG_FILE = 64 * 1024 * 1024
+    KEEP_DAYS = 30
+    REVALIDATE = 6 * 3600
+
+    def __init__(self, entries=None):
+        self.index_file = os.path.join(os.environ['USERPROFILE'], '.ccleaner_size_index.json')
+        self.entries = self.load() if entries is None else entries
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except: pass
+        return {}
+
+    def save(self):
+        if not self.dirty: return
+        today = int(time.time() // 86400)
+        with self._lock:
+            # 丢弃长期未访问的记录（已删除或不再扫描的目录）；原地删除而不替换 self.entries，
+            # 保存期间其他线程写入的记录不会丢失
+            for k in [k for k, v in self.entries.items() if today - v[5] > self.KEEP_DAYS]: del self.entries[k]
+            # 在锁内取快照（记录只会被原地改写最近使用日），写盘期间的并发 scan_dir 不影响序列化
+            snapshot = {k: list(v) for k, v in self.entries.items()}
+            self.dirty = False
+        try:
+            # 先写临时文件再原子替换，写到一半被中断（关机、崩溃）也不会留下损坏的索引
+            tmp = self.index_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.index_file)
+        except (OSError, ValueError):
+            self.dirty = True  # 写盘失败：保留脏标记，下次再存
+
+    def merge(self, entries):
+        """并入其他进程更新过的记录（进程后端的分片切片）"""
+        with self._lock:
+            self.entries.update(entries)
+            self.dirty = True
+
+    def keys(self):
+        """全部目录键（已排序），供按子树切片"""
+        with self._lock: return sorted(self.entries)
+
+    def clear(self):
+        """强制全量刷新：清空索引，下次扫描重新统计"""
+        with self._lock: self.entries = {}
+        self.dirty = True
+        self.save()
+
+    def scan_dir(self, path, stats=None, ordered=False):
+        """返回 (直属文件大小, 直属文件数, 子目录路径列表)，目录 mtime 未变时直接取索引"""
+        try: mtime = os.stat(path).st_mtime_ns
+        except: return 0, 0, []
+        now = time.time()
+        today = int(now // 86400)
+        with self._lock:
+            rec = self.entries.get(path)
+            hit = rec and rec[0] == mtime and len(rec) > 6 and now - rec[6] < self.REVALIDATE
+            if hit and rec[5] != today: rec[5] = today; self.dirty = True
+        if hit:
+            size = rec[1]
+            for name in rec[4]:
+                try: size += os.stat(os.path.join(path, name)).st_size
+                except: pass
+            return size, rec[2], [os.path.join(path, n) for n in rec[3]]
+        size, count, subdirs, big = scan_dir_entries(path, stats, ordered)
+        with self._lock:
+            self.entries[path] = [mtime, size, count, [os.path.basename(d) for d in subdirs], big, today, int(now)]
+            self.dirty = True
+        return size + sum(big.values()), count, subdirs
+
+    def dir_size(self, path, stats=None):
+        """返回 (总大小, 文件数)"""
+        total, count = 0, 0
+        stack = [os.path.normpath(path)]
+        while stack:
+            size, n, subdirs = self.scan_dir(stack.pop(), stats)
+            total += size; count += n
+            stack.extend(subdirs)
+        return total, count
+
+
+# --- 目录名持久索引 ---
+class NameIndex:
+    """单个磁盘（或任意根目录）的目录名索引，思路类似 Everything：每个目录记为 [父目录序号, 名称, mtime_ns]，
+    路径按父目录序号还原。刷新时逐个 stat 目录，mtime 未变的目录沿用记录的子目录而不再列举（目录的增删改名都会改变
+    其 mtime，深处的变化则由逐级 stat 发现）；按名称查询走内存字典，毫秒级。不跟随符号链接与联接点，
+    exclude 中的目录名（小写）在任意深度剪枝。"""
+    PREFIX = '.ccleaner_name_index_'
+
+    def __init__(self, root, exclude=(), index_file=None):
+        self.root = os.path.normpath(root)
+        tag = os.path.splitdrive(self.root)[0].rstrip(":") or re.sub(r"[^0-9A-Za-z]+", "_", self.root).strip("_")
+        self.index_file = index_file or os.path.join(os.environ['USERPROFILE'], f'{self.PREFIX}{tag}.json')
+        self.exclude = {n.lower() for n in exclude}
+        self.parent, self.name, self.mtime = array('q'), [], []
+        self.refreshed = 0
+        self.dirty = False
+        self.stated = self.listed = 0
+        self._by_name = None
+        self.load()
+
+    @classmethod
+    def index_files(cls):
+        """已保存的各磁盘索引文件 [(路径, 字节数)]"""
+        base = os.environ['USERPROFILE']
+        try: return [(e.path, e.stat().st_size) for e in os.scandir(base) if e.name.startswith(cls.PREFIX) and e.name.endswith(".json")]
+        except OSError: return []
+
+    def load(self):
+        if not os.path.exists(self.index_file): return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f: data = json.load(f)
+            if data.get("root") != self.root or not (len(data["parent"]) == len(data["name"]) == len(data["mtime"])): return
+            self.parent, self.name, self.mtime = array('q', data["parent"]), data["name"], data["mtime"]
+            self.refreshed = data.get("refreshed", 0)
+        except: pass
+
+    def save(self):
+        if not self.dirty: return
+        try:
+            tmp = self.index_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"root": self.root, "refreshed": self.refreshed, "parent": self.parent.tolist(), "name": self.name, "mtime": self.mtime}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.index_file)
+            self.dirty = False
+        except: pass
+
+    def clear(self):
+        self.parent, self.name, self.mtime = array('q'), [], []
+        self.refreshed = 0
+        self._by_name = None
+        try: os.remove(self.index_file)
+        except OSError: pass
+
+    def __len__(self):
+        return len(self.name)
+
+    def refresh(self, cancel=None):
+        """按目录 mtime 增量刷新：每个目录 stat 一次，只有 mtime 变化（或新出现）的目录才重新列举子目录"""
+        old_parent, old_name, old_mtime = self.parent, self.name, self.mtime
+        children = {}
+        for i in range(1, len(old_parent)): children.setdefault(old_parent[i], []).append(i)
+        parent, names, mtimes = array('q'), [], []
+        self.stated = self.listed = 0
+        stack = [(self.root, 0 if old_name else None, -1, "")]
+        while stack:
+            if cancel is not None and cancel.is_set(): return False
+            path, old, par, name = stack.pop()
+            try: mtime = os.stat(path).st_mtime_ns
+            except OSError: continue
+            self.stated += 1
+            idx = len(names)
+            parent.append(par); names.append(name); mtimes.append(mtime)
+            if old is not None and old_mtime[old] == mtime:
+                for c in children.get(old, ()): stack.append((os.path.join(path, old_name[c]), c, idx, old_name[c]))
+                continue
+            self.listed += 1
+            known = {old_name[c]: c for c in children.get(old, ())} if old is not None else {}
+            try: entries = list_dir(path)
+            except OSError: continue
+            for e in entries:
+                try:
+                    if not e.is_dir(follow_symlinks=False) or e.name.lower() in self.exclude: continue
+                    if getattr(e.stat(follow_symlinks=False), "st_file_attributes", 0) & 0x400: continue  # 联接点 / 重解析点
+                except OSError: continue
+                stack.append((e.path, known.get(e.name), idx, e.name))
+        self.parent, self.name, self.mtime = parent, names, mtimes
+        self.refreshed = time.time()
+        self._by_name = None
+        self.dirty = True
+        return True
+
+    def path(self, idx):
+        parts = []
+        while idx > 0:
+            parts.append(self.name[idx])
+            idx = self.parent[idx]
+        return os.path.join(self.root, *reversed(parts))
+
+    def find(self, names):
+        """按目录名（不区分大小写）查找，返回 [(路径, 小写名)]，按路径排序"""
+        if self._by_name is None:
+            by_name = {}
+            for i, n in enumerate(self.name): by_name.setdefault(n.lower(), []).append(i)
+            self._by_name = by_name
+        hits = [(self.path(i), n) for n in {n.lower() for n in names} for i in self._by_name.get(n, ())]
+        return sorted(hits)
+
+
+# --- 文件内容哈希持久缓存 ---
+class HashCache:
+    """按 (路径, 大小, mtime, inode) 缓存文件摘要，kind 区分摘要种类（头部哈希、全量哈希、逐字节确认等）。
+    记录为 {kind: {路径: [大小, mtime_ns, inode, 摘要, 最近使用日]}}；签名不符的记录在查询时即被淘汰，
+    长期未使用或超出容量的记录在保存时压缩掉。"""
+    KEEP_DAYS = 60
+    MAX_ENTRIES = 2000000
+
+    def __init__(self):
+        self.cache_file = os.path.join(os.environ['USERPROFILE'], '.ccleaner_hash_cache.json')
+        self.entries = self.load()
+        self.dirty = False
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except: pass
+        return {}
+
+    def save(self):
+        if not self.dirty: return
+        today = int(time.time() // 86400)
+        with self._lock:
+            entries = {kind: {p: r for p, r in recs.items() if today - r[4] <= self.KEEP_DAYS} for kind, recs in self.entries.items()}
+            total = sum(len(recs) for recs in entries.values())
+            if total > self.MAX_ENTRIES:
+                # 超出容量时按 (最近使用日, 插入顺序) 淘汰最旧的记录，恰好保留 MAX_ENTRIES 条；
+                # 同一天写入的大量记录不会因为共享同一个日期而被整体淘汰
+                rows = sorted(((r[4], seq, kind, p) for seq, (kind, p, r) in enumerate((k, p, r) for k, recs in entries.items() for p, r in recs.items())))
+                keep = {(kind, p) for _, _, kind, p in rows[total - self.MAX_ENTRIES:]}
+                entries = {kind: {p: r for p, r in recs.items() if (kind, p) in keep} for kind, recs in entries.items()}
+            self.entries = {kind: recs for kind, recs in entries.items() if recs}
+            # 在锁内取快照（记录本身只会被原地改写最近使用日），写盘期间的并发 put 不影响序列化
+            snapshot = {kind: dict(recs) for kind, recs in self.entries.items()}
+            self.dirty = False
+        try:
+            tmp = self.cache_file + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, self.cache_file)
+        except (OSError, ValueError):
+            self.dirty = True  # 写盘失败：保留脏标记，下次再存
+
+    def clear(self):
+        with self._lock: self.entries = {}
+        self.dirty = True
+        self.save()
+
+    def get(self, kind, path, st):
+        """st 为 os.stat 结果；签名一致时返回缓存的摘要，否则淘汰旧记录并返回 None"""
+        with self._lock:
+            recs = self.entries.get(kind)
+            rec = recs.get(path) if recs else None
+            if rec is None:
+                self.misses += 1
+                return None
+            if rec[:3] != [st.st_size, st.st_mtime_ns, st.st_ino]:
+                del recs[path]
+                self.dirty = True
+                self.misses += 1
+                return None
+            today = int(time.time() // 86400)
+            if rec[4] != today: rec[4] = today; self.dirty = True
+            self.hits += 1
+            return rec[3]
+
+    def put(self, kind, path, st, digest):
+        with self._lock:
+            self.entries.setdefault(kind, {})[path] = [st.st_size, st.st_mtime_ns, st.st_ino, digest, int(time.time() // 86400)]
+            self.dirty = True
+
+    def count(self):
+        return sum(len(recs) for recs in self.entries.values())
+
+
+def peak_memory():
+    """当前进程的峰值内存（字节）：Windows 取 PeakWorkingSetSize，POSIX 取 ru_maxrss"""
+    try:
+        if os.name == "nt":
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [(n, ctypes.c_size_t) for n in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+            pmc = ProcessMemoryCounters()
+            pmc.cb = ctypes.sizeof(pmc)
+            ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+            return pmc.PeakWorkingSetSize
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except: return 0
+
+
+# --- 重复文件候选存储 ---
+class CandidateStore:
+    """海量文件的紧凑候选存储：路径拆成 (目录编号, 文件名)，目录路径只存一份；
+    某个大小首次出现时只记在 first 字典里，出现第二个同尺寸文件后两者才进入按列存放的 array 中，
+    扫描结束时仍只有一个文件的大小直接丢弃。估算内存超过 mem_limit 时，把内存中的记录按大小分区
+    追加到临时文件（溢写），结束时逐个分区读回分组，任一时刻只有一个分区驻留内存。"""
+    PARTITIONS = 16
+    # 粗略的单条记录内存开销（字节）：first 字典项 + 元组；列式记录的三列 + 文件名对象
+    FIRST_COST, ROW_COST = 160, 80
+
+    def __init__(self, mem_limit=256 * 1024 * 1024):
+        self.mem_limit = mem_limit
+        self.dirs, self._dir_bytes = [], 0
+        self.files = self.spills = 0
+        self.mem_bytes = self.peak_bytes = 0
+        self._spill_dir = None
+        self._reset()
+
+    def _reset(self):
+        self.first, self.multi = {}, set()
+        self.sizes, self.dir_ids, self.names = array('q'), array('q'), []
+        self.mem_bytes = self._dir_bytes
+
+    def add_dir(self, path):
+        self.dirs.append(path)
+        self._dir_bytes += 100 + len(path) * 2
+        return len(self.dirs) - 1
+
+    def add(self, dir_id, name, size):
+        self.files += 1
+        if size in self.multi: self._append(size, dir_id, name)
+        elif size in self.first:
+            first_dir, first_name = self.first.pop(size)
+            self.mem_bytes -= self.FIRST_COST + len(first_name)
+            self._append(size, first_dir, first_name)
+            self._append(size, dir_id, name)
+            self.multi.add(size)
+        else:
+            self.first[size] = (dir_id, name)
+            self.mem_bytes += self.FIRST_COST + len(name)
+        if self.mem_bytes > self.peak_bytes: self.peak_bytes = self.mem_bytes
+        if self.mem_bytes > self.mem_limit: self._spill()
+
+    def _append(self, size, dir_id, name):
+        self.sizes.append(size); self.dir_ids.append(dir_id); self.names.append(name)
+        self.mem_bytes += self.ROW_COST + len(name)
+
+    def _rows(self):
+        yield from zip(self.sizes, self.dir_ids, self.names)
+        for size, (dir_id, name) in self.first.items(): yield size, dir_id, name
+
+    def _spill(self):
+        """把内存中的全部记录按 size % PARTITIONS 追加到分区文件，然后清空内存"""
+        if self._spill_dir is None: self._spill_dir = tempfile.mkdtemp(prefix="cc_dup_spill_")
+        # 记录以 NUL 分隔（文件名中不可能出现 NUL）：大小\0目录编号\0文件名\0
+        parts = [[] for _ in range(self.PARTITIONS)]
+        for size, dir_id, name in self._rows(): parts[size % self.PARTITIONS].append(f"{size}\0{dir_id}\0{name}\0")
+        for i, rows in enumerate(parts):
+            if not rows: continue
+            with open(os.path.join(self._spill_dir, f"p{i:02d}.bin"), 'a', encoding='utf-8', errors='surrogatepass') as f:
+                f.write("".join(rows))
+        self.spills += 1
+        self._reset()
+
+    def groups(self):
+        """产出 (大小, [完整路径, ...])，只包含至少两个文件的大小"""
+        if self._spill_dir is None:
+            order = sorted(range(len(self.sizes)), key=self.sizes.__getitem__)
+            yield from self._group_rows((self.sizes[i], self.dir_ids[i], self.names[i]) for i in order)
+            return
+        self._spill()
+        for i in range(self.PARTITIONS):
+            part = os.path.join(self._spill_dir, f"p{i:02d}.bin")
+            if not os.path.exists(part): continue
+            with open(part, 'r', encoding='utf-8', errors='surrogatepass', newline='') as f: fields = f.read().split("\0")
+            buckets = {}
+            for j in range(0, len(fields) - 2, 3):
+                size = int(fields[j])
+                buckets.setdefault(size, []).append((size, int(fields[j + 1]), fields[j + 2]))
+            for size in sorted(buckets):
+                if len(buckets[size]) > 1: yield from self._group_rows(buckets[size])
+
+    def _group_rows(self, rows):
+        cur, paths = None, []
+        for size, dir_id, name in rows:
+            if size != cur:
+                if len(paths) > 1: yield cur, paths
+                cur, paths = size, []
+            paths.append(os.path.join(self.dirs[dir_id], name))
+        if len(paths) > 1: yield cur, paths
+
+    def close(self):
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+
+# --- 相似图片：感知哈希与聚类 ---
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp"}
+
+def dhash_image(path):
+    """差值哈希 (dHash)：缩成 9x8 灰度图，逐行比较相邻像素得 64 位整数；无法解码返回 None。
+    JPEG 先用 draft 让解码器直接按 1/8 缩放解码，省掉大部分解码开销"""
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (64, 64))
+            small = img.convert("L").resize((9, 8), Image.BILINEAR)
+            if np is not None:
+                px = np.asarray(small, dtype=np.int16)
+                return int.from_bytes(np.packbits(px[:, 1:] > px[:, :-1]).tobytes(), "big")
+            px = list(small.getdata())
+            bits = 0
+            for row in range(8):
+                for col in range(8):
+                    bits = (bits << 1) | (px[row * 9 + col + 1] > px[row * 9 + col])
+            return bits
+    except Exception: return None
+
+
+def _popcount_table():
+    return np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def cluster_hashes(hashes, max_distance=4, block=512, rank=None):
+    """把 64 位感知哈希按汉明距离 <= max_distance 聚类，返回 [[下标, ...], ...]（仅含两个以上成员的簇，保留者在首位）。
+    完全相同的哈希先合并为一个代表，只对不同的哈希值找近邻，大量副本不会产生成对比较。
+    多索引分桶：哈希切成 max_distance+1 段，距离不超过阈值的两个哈希至少有一段完全相同（鸽巢原理），
+    因此只需比较同桶成员；有 NumPy 时每个桶内整块做异或 + 查表计数。
+    近邻关系连通的一组再以保留者为中心切分：按 rank（越小越优先，默认下标）取未分配的最优成员为保留者，
+    只把与它距离不超过阈值的成员归入该簇，避免 A~B~C 链式相连时把相距很远的图片判为重复"""
+    n = len(hashes)
+    rank = rank or list(range(n))
+    uniq = {}
+    for i, h in enumerate(hashes): uniq.setdefault(h, []).append(i)
+    values = list(uniq)
+    m = len(values)
+    parent = list(range(m))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj: parent[rj] = ri
+
+    segs = max_distance + 1
+    widths = [64 // segs + (1 if k < 64 % segs else 0) for k in range(segs)]
+    if np is not None and m > 1:
+        arr = np.array(values, dtype=np.uint64)
+        table = _popcount_table()
+
+        def popcount(x):
+            return table[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+        found = []
+        shift = 64
+        for w in widths:
+            shift -= w
+            keys = (arr >> np.uint64(shift)) & np.uint64((1 << w) - 1)
+            order = np.argsort(keys, kind="stable")
+            sk = keys[order]
+            # 同桶成员排序后相邻：按间隔 d 整体比较 sk[i] 与 sk[i+d]，一次取出全部间隔为 d 的同桶对
+            for d in range(1, min(m, block)):
+                same = np.flatnonzero(sk[:-d] == sk[d:])
+                if not len(same): break
+                a, b = order[same], order[same + d]
+                hit = popcount(arr[a] ^ arr[b]) <= max_distance
+                found.append((a[hit], b[hit]))
+            # 超大桶（段值相同而哈希各异）中间隔 >= block 的成员对按块比较
+            starts = np.flatnonzero(np.r_[True, sk[1:] != sk[:-1]])
+            lengths = np.diff(np.r_[starts, m])
+            for st, ln in zip(starts[lengths > block].tolist(), lengths[lengths > block].tolist()):
+                run = order[st:st + ln]
+                h = arr[run]
+                for r0 in range(0, ln, block):
+                    dist = popcount(h[r0:r0 + block, None] ^ h[None, :])
+                    rows, cols = np.nonzero(dist <= max_distance)
+                    rows += r0
+                    far = cols - rows >= block
+                    found.append((run[rows[far]], run[cols[far]]))
+        for a, b in found:
+            for i, j in zip(a.tolist(), b.tolist()): union(i, j)
+    elif m > 1:
+        shift = 64
+        for w in widths:
+            shift -= w
+            buckets = {}
+            for i, h in enumerate(values): buckets.setdefault((h >> shift) & ((1 << w) - 1), []).append(i)
+            for members in buckets.values():
+                for a in range(len(members)):
+                    for b in range(a + 1, len(members)):
+                        if bin(values[members[a]] ^ values[members[b]]).count("1") <= max_distance: union(members[a], members[b])
+    components = {}
+    for u in range(m): components.setdefault(find(u), []).append(u)
+    clusters = []
+    for comp in components.values():
+        if len(comp) == 1:
+            if len(uniq[values[comp[0]]]) > 1: clusters.append(sorted(uniq[values[comp[0]]], key=lambda i: rank[i]))
+            continue
+        left = sorted((i for u in comp for i in uniq[values[u]]), key=lambda i: rank[i])
+        while len(left) > 1:
+            keep = hashes[left[0]]
+            near = [i for i in left if bin(hashes[i] ^ keep).count("1") <= max_distance]
+            if len(near) > 1: clusters.append(near)
+            taken = set(near)
+            left = [i for i in left if i not in taken]
+    return clusters
+
+
+# --- 快捷方式 (.lnk, MS-SHLLINK) 解析 ---
+LNK_HAS_ID_LIST, LNK_HAS_LINK_INFO, LNK_HAS_NAME, LNK_HAS_RELATIVE_PATH = 0x1, 0x2, 0x4, 0x8
+LNK_HAS_WORKING_DIR, LNK_HAS_ARGUMENTS, LNK_HAS_ICON, LNK_IS_UNICODE, LNK_HAS_EXP_STRING = 0x10, 0x20, 0x40, 0x80, 0x200
+LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+ENV_BLOCK_SIG = 0xA0000001
+
+def _ansi(raw):
+    try: return raw.decode("mbcs")
+    except LookupError: return raw.decode("latin-1")
+
+def _cstr(buf, off, wide=False):
+    """从 buf[off:] 读取以 NUL 结尾的字符串（ANSI 或 UTF-16LE）"""
+    if off <= 0 or off >= len(buf): return ""
+    if wide:
+        end = off
+        while end + 1 < len(buf) and buf[end:end + 2] != b"\0\0": end += 2
+        return buf[off:end].decode("utf-16-le", errors="replace")
+    end = buf.find(b"\0", off)
+    return _ansi(buf[off:end if end != -1 else len(buf)])
+
+def parse_lnk(data):
+    """解析 .lnk 二进制内容，返回 {"target", "kind", "relative_path", "working_dir", "arguments"}；
+    kind 为 local（本地路径）、unc（网络共享）、env（环境变量目标）、relative（仅相对路径）或 None（纯 Shell 命名空间链接，
+    如“此电脑”，没有文件系统目标）。只顺序解析头部、LinkTargetIDList 长度、LinkInfo 与 StringData，
+    仅当 LinkInfo 不含路径时才查看 ExtraData 中的环境变量块。格式不符返回 None。"""
+    if len(data) < 76 or struct.unpack_from("<I", data, 0)[0] != 0x4C or data[4:20] != LNK_CLSID: return None
+    flags = struct.unpack_from("<I", data, 20)[0]
+    pos = 76
+    if flags & LNK_HAS_ID_LIST: pos += 2 + struct.unpack_from("<H", data, pos)[0]
+    info = {"target": None, "kind": None, "relative_path": None, "working_dir": None, "arguments": None}
+    if flags & LNK_HAS_LINK_INFO:
+        li = data[pos:pos + struct.unpack_from("<I", data, pos)[0]]
+        pos += len(li)
+        hdr_size, li_flags, _, local_off, net_off, suffix_off = struct.unpack_from("<IIIIII", li, 4)
+        local_w = suffix_w = 0
+        if hdr_size >= 0x24: local_w, suffix_w = struct.unpack_from("<II", li, 28)
+        suffix = _cstr(li, suffix_w, True) if suffix_w else _cstr(li, suffix_off)
+        if li_flags & 0x1:
+            base = _cstr(li, local_w, True) if local_w else _cstr(li, local_off)
+            info["target"], info["kind"] = base + suffix, "local"
+        elif li_flags & 0x2:
+            net = li[net_off:]
+            net_name_off = struct.unpack_from("<I", net, 8)[0]
+            name = _cstr(net, struct.unpack_from("<I", net, 20)[0], True) if net_name_off > 0x14 else _cstr(net, net_name_off)
+            info["target"], info["kind"] = name.rstrip("\\") + ("\\" + suffix if suffix else ""), "unc"
+    wide = bool(flags & LNK_IS_UNICODE)
+    for flag, key in ((LNK_HAS_NAME, None), (LNK_HAS_RELATIVE_PATH, "relative_path"), (LNK_HAS_WORKING_DIR, "working_dir"),
+                      (LNK_HAS_ARGUMENTS, "arguments"), (LNK_HAS_ICON, None)):
+        if not flags & flag: continue
+        count = struct.unpack_from("<H", data, pos)[0]
+        size = count * 2 if wide else count
+        raw = data[pos + 2:pos + 2 + size]
+        pos += 2 + size
+        if key: info[key] = raw.decode("utf-16-le", errors="replace") if wide else _ansi(raw)
+    if info["target"] is None and flags & LNK_HAS_EXP_STRING:
+        # ExtraData：逐块查找 EnvironmentVariableDataBlock（TargetAnsi 260 字节 + TargetUnicode 520 字节）
+        while pos + 8 <= len(data):
+            block_size, sig = struct.unpack_from("<II", data, pos)
+            if block_size < 4: break
+            if sig == ENV_BLOCK_SIG and block_size >= 0x314:
+                target = _cstr(data, pos + 268, True) or _cstr(data, pos + 8)
+                info["target"], info["kind"] = target, "env"
+                break
+            pos += block_size
+    if info["target"] is None and info["relative_path"]: info["kind"] = "relative"
+    return info
+
+def read_lnk(path, limit=65536):
+    """读取并解析 .lnk 文件（快捷方式通常只有几 KB，一次读入）"""
+    try:
+        with open(path, "rb") as f: return parse_lnk(f.read(limit))
+    except (OSError, struct.error, ValueError): return None
+
+
+class PathExistenceCache:
+    """批量判断路径是否存在：每个父目录只列举一次，结果缓存为名称集合（大小写按系统规则归一）。
+    父目录不存在时其下所有路径都不存在；无权限列举、网络路径等无法批量判断的情况退回单独检查。"""
+
+    def __init__(self):
+        self.listings = {}
+        self.listed = self.fallbacks = 0
+
+    def exists(self, path):
+        path = os.path.normpath(path)
+        parent, name = os.path.split(path)
+        if not name or path.startswith("\\\\") or parent == path:
+            self.fallbacks += 1
+            return os.path.exists(path)
+        key = os.path.normcase(parent)
+        if key not in self.listings:
+            try: self.listings[key] = {os.path.normcase(n) for n in os.listdir(parent)}
+            except (FileNotFoundError, NotADirectoryError): self.listings[key] = None
+            except OSError: self.listings[key] = False
+            self.listed += 1
+        names = self.listings[key]
+        if names is None: return False
+        if names is False:
+            self.fallbacks += 1
+            return os.path.exists(path)
+        return os.path.normcase(name) in names
+
+
+# --- 回收站 $I 元数据 ---
+FILETIME_EPOCH = 116444736000000000  # 1601-01-01 到 1970-01-01 的 100ns 间隔数
+
+def parse_recycle_info(data):
+    """解析回收站 $I 记录，返回 {"version", "size", "deleted_at"(Unix 时间戳), "original_path"}，格式不符返回 None。
+    v1（Vista ~ Win8）: 版本(8) 原大小(8) 删除时间 FILETIME(8) 原路径 UTF-16 定长 520 字节；
+    v2（Win10 起）: 版本(8) 原大小(8) 删除时间(8) 路径字符数含结尾 NUL(4) 原路径 UTF-16"""
+    if len(data) < 24: return None
+    version, size, filetime = struct.unpack_from("<qqq", data, 0)
+    if version == 1:
+        raw = data[24:24 + 520]
+    elif version == 2 and len(data) >= 28:
+        count = struct.unpack_from("<I", data, 24)[0]
+        raw = data[28:28 + count * 2]
+    else: return None
+    path = raw.decode("utf-16-le", errors="replace").split("\0", 1)[0]
+    if not path or size < 0: return None
+    return {"version": version, "size": size, "deleted_at": (filetime - FILETIME_EPOCH) / 1e7, "original_path": path}
+
+def read_recycle_bin(root):
+    """列出一个 $Recycle.Bin 目录（其下每个 SID 子目录）中的全部删除项，只读取小巧的 $I 记录：
+    返回 [{..., "info_path": $I 路径, "payload_path": 对应的 $R 路径}]"""
+    items = []
+    try: sids = [e.path for e in os.scandir(root) if e.is_dir(follow_symlinks=False)]
+    except OSError: return items
+    for sid in sids:
+        try: entries = [e for e in os.scandir(sid) if e.name.startswith("$I")]
+        except OSError: continue
+        for e in entries:
+            try:
+                with open(e.path, "rb") as f: rec = parse_recycle_info(f.read(4096))
+            except OSError: continue
+            if rec:
+                rec["info_path"] = e.path
+                rec["payload_path"] = os.path.join(sid, "$R" + e.name[2:])
+                items.append(rec)
+    return items
+
+
+# --- 浏览器配置文件与扩展 ---
+EXT_ID_RE = re.compile(r"^[a-p]{32}$")
+EXT_ORIGIN_RE = re.compile(rb"chrome-extension://([a-p]{32})")
+EXT_IDB_RE = re.compile(r"^chrome-extension_([a-p]{32})_\d+\.indexeddb\.(?:leveldb|blob)$")
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def chromium_profiles(user_data):
+    """由 User Data 下的 Local State（profile.info_cache）列出配置文件 [(目录名, 显示名)]，无需遍历；
+    Local State 缺失或损坏时退回列举一层 Default / Profile N 目录"""
+    state = _read_json(os.path.join(user_data, "Local State")) or {}
+    cache = (state.get("profile") or {}).get("info_cache") or {}
+    profiles = [(d, (info or {}).get("name") or d) for d, info in cache.items() if os.path.isdir(os.path.join(user_data, d))]
+    if profiles or cache: return profiles
+    try: return [(e.name, e.name) for e in os.scandir(user_data) if e.is_dir() and (e.name == "Default" or e.name.startswith("Profile "))]
+    except OSError: return []
+
+def _locale_message(ext_dir, manifest, key):
+    """解析 __MSG_xxx__ 形式的名称：先查 default_locale，再退回 zh_CN / en；消息键不区分大小写"""
+    key = key.lower()
+    for loc in (manifest.get("default_locale"), "zh_CN", "en", "en_US"):
+        if not loc: continue
+        msgs = _read_json(os.path.join(ext_dir, "_locales", loc, "messages.json"))
+        if not isinstance(msgs, dict): continue
+        for k, v in msgs.items():
+            if k.lower() == key and isinstance(v, dict) and v.get("message"): return v["message"]
+    return None
+
+def extension_name(ext_root):
+    """Extensions/<ID> 下取最新版本目录的 manifest.json 名称，本地化名称查 _locales；读不到时返回 None"""
+    try: versions = sorted((e for e in os.scandir(ext_root) if e.is_dir()), key=lambda e: e.stat().st_mtime, reverse=True)
+    except OSError: return None
+    for v in versions:
+        manifest = _read_json(os.path.join(v.path, "manifest.json"))
+        if not isinstance(manifest, dict): continue
+        name = manifest.get("name") or ""
+        if name.startswith("__MSG_") and name.endswith("__"): name = _locale_message(v.path, manifest, name[6:-2]) or ""
+        if name: return name
+    return None
+
+def extension_names(profile):
+    """配置文件内已安装扩展 {ID: 名称}"""
+    root = os.path.join(profile, "Extensions")
+    try: ids = [e.name for e in os.scandir(root) if e.is_dir() and EXT_ID_RE.match(e.name)]
+    except OSError: return {}
+    return {i: extension_name(os.path.join(root, i)) or i for i in ids}
+
+def extension_storage_dirs(profile):
+    """一次列举配置文件中的扩展存储位置，按扩展 ID 归类：{ID: [(类别, 路径)]}。
+    Local Extension Settings / IndexedDB 目录名直接带 ID；Service Worker 的 CacheStorage 目录名是来源哈希，
+    从其 index.txt 头部读出 chrome-extension:// 来源"""
+    found = {}
+    def scan(sub, ident):
+        try: entries = os.scandir(os.path.join(profile, *sub))
+        except OSError: return
+        with entries:
+            for e in entries:
+                if not e.is_dir(follow_symlinks=False): continue
+                ext_id = ident(e)
+                if ext_id: found.setdefault(ext_id, []).append((sub[0], e.path))
+    def worker_origin(e):
+        try:
+            with open(os.path.join(e.path, "index.txt"), "rb") as f: m = EXT_ORIGIN_RE.search(f.read(4096))
+        except OSError: return None
+        return m.group(1).decode() if m else None
+    scan(("Local Extension Settings",), lambda e: e.name if EXT_ID_RE.match(e.name) else None)
+    scan(("IndexedDB",), lambda e: (lambda m: m.group(1) if m else None)(EXT_IDB_RE.match(e.name)))
+    scan(("Service Worker", "CacheStorage"), worker_origin)
+    return found
+
+
+# --- 文件头类型识别 ---
+OFFICE_EXTS = {'.docx', '.xlsx', '.pptx', '.doc', '.xls', '.ppt', '.wps', '.et', '.dps'}
+MAGIC_SIGNATURES = [
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"%PDF-", "pdf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "office"),  # OLE 复合文档：doc / xls / ppt
+    (b"PK\x03\x04", "zip"),
+]
+# 微信 .dat 图片的异或密钥可由图片头部的前两个字节推出：(首字节, 次字节)
+XOR_IMAGE_HEADS = [(0xFF, 0xD8), (0x89, 0x50), (0x47, 0x49)]
+
+def read_heads(paths, n=16):
+    """依次读取每个文件开头 n 字节，拼成一段 len(paths) * n 的缓冲区（不足或读取失败处补零）"""
+    buf = bytearray(len(paths) * n)
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+    for i, p in enumerate(paths):
+        # 直接用 os.open / os.read，省去文件对象的创建开销（每个文件只读一次）
+        try: fd = os.open(p, flags)
+        except OSError: continue
+        try: head = os.read(fd, n)
+        except OSError: head = b""
+        finally: os.close(fd)
+        buf[i * n:i * n + len(head)] = head
+    return bytes(buf)
+
+def classify_magic(head, path=""):
+    """按文件头判断真实类型：jpg / png / gif / webp / mp4 / pdf / office / zip，无法识别返回 "other"。
+    PK 压缩包按扩展名区分 Office 文档与普通 zip"""
+    for sig, kind in MAGIC_SIGNATURES:
+        if head.startswith(sig):
+            if kind == "zip" and os.path.splitext(path)[1].lower() in OFFICE_EXTS: return "office"
+            return kind
+    if head[4:8] == b"ftyp": return "mp4"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return "webp"
+    return "other"
+
+def xor_key_vote(head):
+    """若 head 是按单字节异或混淆的常见图片头，返回密钥，否则 None"""
+    if len(head) < 2: return None
+    for first, second in XOR_IMAGE_HEADS:
+        key = head[0] ^ first
+        if head[1] ^ key == second: return key
+    return None
+
+def guess_xor_key(heads):
+    """多个 .dat 文件头投票得出异或密钥；票数不足半数时返回 None"""
+    votes = Counter(k for k in map(xor_key_vote, heads) if k is not None)
+    if not votes: return None
+    key, count = votes.most_common(1)[0]
+    return key if count * 2 >= sum(votes.values()) else None
+
+
+# --- 明文凭据内容扫描 ---
+def _word_start(buf, i):
+    return i == 0 or not (buf[i - 1:i].isalnum() or buf[i - 1:i] == b"_")
+
+DB_SCHEMES = (b"mysql", b"postgres", b"postgresql", b"mongodb", b"mongodb+srv", b"redis", b"rediss", b"amqp", b"mssql", b"sqlserver", b"oracle")
+
+def _db_scheme(buf, i):
+    """"://" 之前须是数据库协议名"""
+    head = buf[max(0, i - 12):i]
+    return any(head.endswith(s) and _word_start(buf, i - len(s)) for s in DB_SCHEMES)
+
+# key / token 须是变量名的后缀（API_KEY、access_token）：前面是 _ / - 分隔符，或驼峰写法小写化后的常见前缀（apikey、accesstoken）
+_KEY_PREFIXES = (b"api", b"access", b"auth", b"secret", b"private", b"client", b"refresh", b"session", b"bearer", b"app")
+
+def _key_suffix(buf, i):
+    return buf[i - 1:i] in (b"_", b"-") or any(buf[max(0, i - len(p)):i] == p and _word_start(buf, i - len(p)) for p in _KEY_PREFIXES)
+
+# 口令取值的占位符：${VAR} / {{var}} / <password> / %VAR% 形式的模板变量，以及 changeme、xxxxxx 等常见示例值。
+# 以否定前瞻写在值的开头，取值须在引号 / 分号 / 空白 / 数据末尾处结束才算整体匹配；口令类规则均在小写化数据上匹配
+_PLACEHOLDER = (rb"(?!\$\{|\{\{|<[^\"'\s]*>(?=[\"';\s]|$)|%[^\"'\s%]+%(?=[\"';\s]|$)|(?:x+|\*+|\.\.\.+)(?=[\"';\s]|$)"
+                rb"|(?:changeme|change_me|changeit|password|passwd|your_?password(?:_here)?|placeholder|example|redacted|dummy|secret)(?=[\"';\s]|$))")
+# 口令赋值的取值：带引号的任意值；或 .env / YAML 式不带引号的值，到空白或行尾结束。不带引号时须含数字且不含括号、逗号、分号，
+# 以排除 password = get_password()、apiKey = process.env.API_KEY; 之类的代码
+_ASSIGNED_VALUE = (rb"[\"']?\s*[=:][ \t]*(?:[\"']" + _PLACEHOLDER + rb"[^\"'\s]{6,}[\"']"
+                   rb"|" + _PLACEHOLDER + rb"(?=[^\s\"'(),;]*\d)[^\s\"'(),;]{6,}(?=\s|$))")
+
+# 每条规则: (名称, [(锚点, 正则, 是否在小写化数据上匹配, 起始位置校验)])。每个正则都以锚点字面量开头：
+# 先用 find 判断锚点是否出现（memchr 级速度，多数文件到此为止），出现后从该处起由正则引擎在 C 层继续扫描；
+# 不区分大小写的规则在小写化的数据上匹配小写正则。每条规则在一个文件里命中一次即停止
+SECRET_RULES = [
+    ("PEM 私钥", [(b"-----BEGIN ", re.compile(rb"-----BEGIN (?:RSA |EC |DSA |OPENSSH |ENCRYPTED |PGP )?PRIVATE KEY(?: BLOCK)?-----"), False, None)]),
+    ("AWS 访问密钥", [(b"A", re.compile(rb"A(?:KIA|SIA)[0-9A-Z]{16}(?![0-9A-Za-z])"), False, _word_start)]),
+    ("AWS 私有密钥", [(b"aws", re.compile(rb"aws_?secret_?access_?key[\"']?\s*[=:]\s*[\"']?[a-z0-9/+=]{40}"), True, None)]),
+    ("阿里云 AccessKey", [(b"LTAI", re.compile(rb"LTAI[0-9A-Za-z]{12,20}(?![0-9A-Za-z])"), False, _word_start)]),
+    ("GitHub 令牌", [(b"gh", re.compile(rb"gh(?:[pousr]_[A-Za-z0-9]{36}|ithub_pat_[A-Za-z0-9_]{60,})"), False, _word_start)]),
+    ("Slack 令牌", [(b"xox", re.compile(rb"xox[abprs]-[A-Za-z0-9-]{10,}"), False, _word_start)]),
+    ("JWT 令牌", [(b"eyJ", re.compile(rb"eyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}"), False, _word_start)]),
+    ("数据库连接串", [(b"://", re.compile(rb"://[^\s:/@\"']+:[^\s@/\"']+@"), True, _db_scheme)]),
+    ("连接串口令", [(b"p", re.compile(rb"p(?:assword|wd)\s*=\s*" + _PLACEHOLDER + rb"[^;\s\"']{4,}\s*;"), True, _word_start)]),
+    # mysql / mysqldump 的 -p 后紧跟口令（单独的 -p 为交互输入，-P 为端口，故区分大小写）；$VAR 取自环境变量，不算
+    ("命令行口令", [(b"mysql", re.compile(rb"mysql(?:dump|admin|import|sh)?(?:\.exe)?[ \t](?:[^\n]*?[ \t])?-p(?![\s$-])[^\s\"']{4,}"), False, _word_start)]),
+    # 键名以 password / secret / token / key 结尾即可（DB_PASSWORD、client_secret、API_KEY），同一字面量前缀合并为一个正则
+    ("口令赋值", [(k, re.compile(k + rest + _ASSIGNED_VALUE), True, check)
+                 for k, rest, check in ((b"pass", rb"(?:word|wd)", None), (b"secret", rb"(?:_?key)?", None), (b"token", rb"", _key_suffix), (b"key", rb"", _key_suffix))]),
+]
+SECRET_OVERLAP = 1024  # 分块间的重叠字节数，覆盖最长的凭据形式
+SECRET_SKIP_EXTS = IMAGE_EXTS | {
+    '.mp4', '.mkv', '.avi', '.mov', '.mp3', '.wav', '.flac', '.zip', '.rar', '.7z', '.gz', '.iso', '.exe', '.dll', '.msi',
+    '.sys', '.pdf', '.docx', '.xlsx', '.pptx', '.doc', '.xls', '.ppt', '.psd', '.ttf', '.otf', '.woff', '.pyc', '.obj', '.lib', '.pdb',
+}
+
+def find_secrets(data, rules=SECRET_RULES, found=None, base=0):
+    """在 data（bytes）中查找凭据，返回 {名称: 偏移}；found 为已命中的规则（跨数据块累积时跳过）"""
+    found = {} if found is None else found
+    low = None
+    for label, patterns in rules:
+        if label in found: continue
+        for anchor, rx, lower, check in patterns:
+            if lower and low is None: low = data.lower()
+            buf = low if lower else data
+            j = buf.find(anchor)
+            while j != -1:
+                m = rx.search(buf, j)
+                if not m: break
+                if check is None or check(buf, m.start()):
+                    found[label] = base + m.start()
+                    break
+                j = m.start() + 1
+            if label in found: break
+    return found
+
+def _secret_labels(found):
+    return [label for label, _ in SECRET_RULES if label in found]
+
+def sniff_binary(head):
+    """前缀含 NUL 视为二进制（UTF-16 文本也在此跳过）"""
+    return b"\0" in head
+
+def scan_file_secrets(path, size, chunk=8 * 1024 * 1024):
+    """扫描单个文件：先读 4KB 嗅探二进制，再按块扫描（大文件用 mmap 分块，块间重叠一个窗口，避免凭据跨块被截断）。
+    返回命中的规则名称列表；二进制文件返回空列表，无法读取时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4096)
+            if not head or sniff_binary(head): return []
+            if size <= len(head): return _secret_labels(find_secrets(head))
+            if size <= 256 * 1024: return _secret_labels(find_secrets(head + f.read()))
+            found = {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                overlap = SECRET_OVERLAP
+                for start in range(0, len(mm), chunk):
+                    begin = max(0, start - overlap)
+                    find_secrets(mm[begin:start + chunk], found=found, base=begin)
+                    if len(found) == len(SECRET_RULES): break
+            return _secret_labels(found)
+    except (OSError, ValueError): return None
+
+
+# --- 覆写粉碎 ---
+class ShredEngine:
+    """原地覆写粉碎：以读写方式打开文件（不截断、不追加），从偏移 0 起按块覆写完整长度，每遍使用一块预先生成的
+    随机图样（shake_128 密钥流，整个引擎只生成一次并反复复用，不再逐文件调用 os.urandom）。
+    多遍覆写时每遍之间 fsync，保证各遍都真正落盘；最后一遍的 fsync 按批进行（先写一批文件再集中刷盘）。
+    verify=True 时在删除前回读全文与图样比对。注意：SSD 的磨损均衡与 NTFS 压缩 / 稀疏文件可能保留旧数据副本，
+    文件级覆写无法触及这些位置。"""
+    BLOCK = 4 * 1024 * 1024
+
+    def __init__(self, passes=1, fsync_batch=32, verify=False, block=BLOCK):
+        self.passes = max(1, passes)
+        self.fsync_batch = max(1, fsync_batch)
+        self.verify = verify
+        self.block = block
+        key = os.urandom(32)
+        self.patterns = [hashlib.shake_128(key + p.to_bytes(4, "little")).digest(block) for p in range(self.passes)]
+        self.files = self.bytes = self.errors = 0
+        self.seconds = 0.0
+        self._pending = []
+
+    def _write_pass(self, fd, size, pattern):
+        os.lseek(fd, 0, os.SEEK_SET)
+        view, left = memoryview(pattern), size
+        while left > 0:
+            n = os.write(fd, view[:min(left, len(view))])
+            left -= n
+        self.bytes += size
+
+    def _verify(self, fd, size):
+        """回读全文：每块都应与最后一遍的图样一致，原内容即已不存在"""
+        pattern, done = self.patterns[-1], 0
+        os.lseek(fd, 0, os.SEEK_SET)
+        while done < size:
+            n = min(len(pattern), size - done)
+            data = os.read(fd, n)
+            if data != pattern[:len(data)] or not data: return False
+            done += len(data)
+        return True
+
+    def shred(self, paths):
+        """逐个覆写并删除，产出每个文件的 (路径, 大小, 耗时秒, 是否成功)；耗时含该文件所在批次的 fsync 分摊"""
+        for path in paths:
+            t0 = time.perf_counter()
+            try:
+                try: os.chmod(path, stat.S_IWRITE | stat.S_IREAD)  # 只读文件也要能覆写
+                except OSError: pass
+                fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+            except OSError:
+                self.errors += 1
+                yield path, 0, 0.0, False
+                continue
+            try:
+                size = os.fstat(fd).st_size
+                for i, pattern in enumerate(self.patterns):
+                    self._write_pass(fd, size, pattern)
+                    if i < self.passes - 1: os.fsync(fd)
+            except OSError:
+                os.close(fd)
+                self.errors += 1
+                yield path, 0, time.perf_counter() - t0, False
+                continue
+            self._pending.append((fd, path, size, time.perf_counter() - t0))
+            if len(self._pending) >= self.fsync_batch: yield from self.flush()
+        yield from self.flush()
+
+    def flush(self):
+        """批量落盘最后一遍并删除（先改为随机文件名，再删除）"""
+        pending, self._pending = self._pending, []
+        if not pending: return
+        t0 = time.perf_counter()
+        ok = []
+        for fd, path, size, spent in pending:
+            try:
+                os.fsync(fd)
+                good = not self.verify or self._verify(fd, size)
+            except OSError: good = False
+            os.close(fd)
+            ok.append(good)
+        share = (time.perf_counter() - t0) / len(pending)
+        for (fd, path, size, spent), good in zip(pending, ok):
+            t1 = time.perf_counter()
+            if good:
+                try:
+                    victim = os.path.join(os.path.dirname(path), os.urandom(8).hex())
+                    try: os.replace(path, victim)
+                    except OSError: victim = path
+                    os.remove(victim)
+                except OSError: good = False
+            elapsed = spent + share + time.perf_counter() - t1
+            self.seconds += elapsed
+            if good: self.files += 1
+            else: self.errors += 1
+            yield path, size, elapsed, good
+
+    def rate(self):
+        """累计写入吞吐（MB/s，含多遍覆写的全部写入量）"""
+        return self.bytes / max(self.seconds, 1e-9) / 1048576
+